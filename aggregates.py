@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from schemas import Receipt
+
+
+class Aggregates:
+    """
+    저장 시점에 갱신되는 (날짜, 카테고리)별 합계/건수
+
+    통계 조회는 원본 행 대신 날짜 수 x 카테고리 수 만큼만 훑으므로
+    영수증 건수와 무관하게 일정한 비용으로 끝납니다.
+    """
+
+    def __init__(self):
+        self._days: List[str] = []
+        self._cells: Dict[str, Dict[str, List[int]]] = {}
+
+    def clear(self):
+        self._days.clear()
+        self._cells.clear()
+
+    def add(self, receipt: Receipt):
+        cell = self._cells.get(receipt.date)
+        if cell is None:
+            cell = self._cells[receipt.date] = defaultdict(lambda: [0, 0])
+            insort(self._days, receipt.date)
+        totals = cell[receipt.category]
+        totals[0] += receipt.amount
+        totals[1] += 1
+
+    def remove(self, receipt: Receipt):
+        cell = self._cells.get(receipt.date)
+        if cell is None or receipt.category not in cell:
+            return
+        totals = cell[receipt.category]
+        totals[0] -= receipt.amount
+        totals[1] -= 1
+        if totals[1] <= 0:
+            del cell[receipt.category]
+        if not cell:
+            del self._cells[receipt.date]
+            self._days.pop(bisect_left(self._days, receipt.date))
+
+    def _days_in_range(self, from_date: Optional[str], to_date: Optional[str]) -> List[str]:
+        lo = bisect_left(self._days, from_date) if from_date else 0
+        hi = bisect_right(self._days, to_date) if to_date else len(self._days)
+        return self._days[lo:hi]
+
+    def stats(self, from_date: Optional[str] = None, to_date: Optional[str] = None) -> dict:
+        daily_series = []
+        by_category: Dict[str, int] = defaultdict(int)
+        # (월, 카테고리) -> [합계, 건수]
+        by_month: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0])
+        total_amount = count = 0
+        for day in self._days_in_range(from_date, to_date):
+            day_amount = 0
+            for category, (amount, n) in self._cells[day].items():
+                by_category[category] += amount
+                month_totals = by_month[(day[:7], category)]
+                month_totals[0] += amount
+                month_totals[1] += n
+                day_amount += amount
+                count += n
+            total_amount += day_amount
+            daily_series.append({"date": day, "amount": day_amount})
+
+        category_series = [
+            {"category": c, "amount": a}
+            for c, a in sorted(by_category.items(), key=lambda kv: kv[1], reverse=True)
+        ]
+        return {
+            "total_amount": total_amount,
+            "count": count,
+            "top_category": category_series[0]["category"] if category_series else None,
+            "daily_series": daily_series,
+            "category_series": category_series,
+            "monthly_series": [
+                {"month": m, "category": c, "amount": a, "count": n}
+                for (m, c), (a, n) in sorted(by_month.items())
+            ],
+        }
@@ -0,0 +1,185 @@
+"""
+저장 시점에 갱신되는 이상 지출 / 예산 초과 알림
+
+- 이상 지출: 카테고리별 금액의 스트리밍 평균/분산(Welford). 새 영수증이 그때까지의
+  평균보다 z_threshold 표준편차 이상 크면 outlier 알림
+- 예산 초과: (월, 카테고리)별 누적 지출 카운터. 설정한 월 예산을 처음 넘는 영수증에서 budget 알림
+
+영수증 한 건당 사전 조회 몇 번으로 끝나므로 기록이 쌓여도 저장/조회 비용이 늘지 않습니다.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from schemas import Alert
+
+TOTAL_BUDGET = "total"
+DEFAULT_Z_THRESHOLD = 3.0
+DEFAULT_MIN_SAMPLES = 5
+MAX_ALERTS = 500
+
+
+def _field(receipt, name: str):
+    return receipt.get(name) if isinstance(receipt, dict) else getattr(receipt, name, None)
+
+
+class RunningStats:
+    """Welford 방식의 평균/분산 (추가와 제거 모두 O(1))"""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / (self.count - 1)
+        self._m2 = max(0.0, self._m2 - delta * (x - self.mean))
+        self.count -= 1
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def zscore(self, x: float) -> Optional[float]:
+        std = self.std
+        return (x - self.mean) / std if std > 0 else None
+
+
+class AlertEngine:
+    """
+    영수증 저장마다 observe()를 호출해 알림을 만들고 최근 max_alerts건을 보관
+
+    budgets는 {카테고리 또는 "total": 월 예산} 사전이며, 저장소가 교체돼도 유지되도록
+    밖에서 넘겨받은 객체를 그대로 갱신합니다.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        z_threshold: float = DEFAULT_Z_THRESHOLD,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        max_alerts: int = MAX_ALERTS,
+    ):
+        self.budgets: Dict[str, int] = budgets if budgets is not None else {}
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self._stats: Dict[str, RunningStats] = defaultdict(RunningStats)
+        self._spent: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._overrun: Set[Tuple[str, str]] = set()
+        self._alerts: Deque[Alert] = deque(maxlen=max_alerts)
+        self._latest_day: Optional[str] = None
+
+    def clear(self):
+        """집계와 알림만 비움 (예산 설정은 유지)"""
+        self._stats.clear()
+        self._spent.clear()
+        self._overrun.clear()
+        self._alerts.clear()
+        self._latest_day = None
+
+    def observe(self, receipt, receipt_id: Optional[str] = None) -> List[Alert]:
+        day = str(_field(receipt, "date"))
+        category = _field(receipt, "category")
+        amount = int(_field(receipt, "amount") or 0)
+        month = day[:7]
+        receipt_id = receipt_id or _field(receipt, "id")
+        created_at = _field(receipt, "created_at") or datetime.utcnow()
+        raised = []
+
+        # 자기 자신이 평균을 끌어올리기 전에 비교
+        stats = self._stats[category]
+        z = stats.zscore(amount) if stats.count >= self.min_samples else None
+        if z is not None and z >= self.z_threshold:
+            raised.append(Alert(
+                kind="outlier",
+                message=f"{category} 지출 {amount:,}원이 평균 {stats.mean:,.0f}원보다 {z:.1f} 표준편차 높습니다",
+                receipt_id=receipt_id, date=day, category=category, amount=amount,
+                zscore=round(z, 2), mean=round(stats.mean, 2), created_at=created_at,
+            ))
+        stats.add(amount)
+
+        for key in (category, TOTAL_BUDGET):
+            self._spent[(month, key)] += amount
+            alert = self._check_budget(month, key, day, receipt_id, created_at)
+            if alert is not None:
+                raised.append(alert)
+
+        if self._latest_day is None or day > self._latest_day:
+            self._latest_day = day
+        self._alerts.extend(raised)
+        return raised
+
+    def _check_budget(self, month: str, key: str, day: str, receipt_id=None, created_at=None) -> Optional[Alert]:
+        spent = self._spent.get((month, key), 0)
+        budget = self.budgets.get(key)
+        if budget is None or spent <= budget or (month, key) in self._overrun:
+            return None
+        self._overrun.add((month, key))
+        label = "전체" if key == TOTAL_BUDGET else key
+        return Alert(
+            kind="budget",
+            message=f"{month} {label} 예산 {budget:,}원 초과 (누적 {spent:,}원)",
+            receipt_id=receipt_id, date=day, category=None if key == TOTAL_BUDGET else key,
+            amount=spent, budget=budget, created_at=created_at or datetime.utcnow(),
+        )
+
+    def remove(self, receipt):
+        """중복으로 표시된 영수증을 통계/누적 지출에서 제외 (이미 낸 알림은 남김)"""
+        category, amount = _field(receipt, "category"), int(_field(receipt, "amount") or 0)
+        month = str(_field(receipt, "date"))[:7]
+        if category in self._stats:
+            self._stats[category].remove(amount)
+        for key in (category, TOTAL_BUDGET):
+            if (month, key) in self._spent:
+                self._spent[(month, key)] -= amount
+
+    def alerts(self, limit: Optional[int] = None, kind: Optional[str] = None, receipt_id: Optional[str] = None) -> List[Alert]:
+        """최신순"""
+        found = []
+        for alert in reversed(self._alerts):
+            if (kind and alert.kind != kind) or (receipt_id and alert.receipt_id != receipt_id):
+                continue
+            found.append(alert)
+            if limit and len(found) >= limit:
+                break
+        return found
+
+    def set_budgets(self, budgets: Dict[str, Optional[int]]) -> List[Alert]:
+        """0 또는 None이면 해당 예산 삭제. 가장 최근 달이 이미 새 예산을 넘었으면 바로 알림"""
+        raised = []
+        for key, value in budgets.items():
+            if value:
+                self.budgets[key] = int(value)
+            else:
+                self.budgets.pop(key, None)
+            self._overrun = {k for k in self._overrun if k[1] != key}
+            if self._latest_day is not None:
+                alert = self._check_budget(self._latest_day[:7], key, self._latest_day)
+                if alert is not None:
+                    raised.append(alert)
+        self._alerts.extend(raised)
+        return raised
+
+    def budget_status(self, month: Optional[str] = None) -> dict:
+        month = month or (self._latest_day or "")[:7] or datetime.now().strftime("%Y-%m")
+        keys = list(self._stats) + [TOTAL_BUDGET]
+        return {
+            "month": month,
+            "budgets": dict(self.budgets),
+            "spent": {key: self._spent[(month, key)] for key in keys if (month, key) in self._spent},
+        }
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 
@@ -54,3 +55,156 @@ def summary_stats(df):
         "avg_amount": float(df["amount"].mean()),
         "max_amount": int(df["amount"].max()),
     }
+
+
+GRANULARITIES = ("day", "week", "month")
+# granularity=lttb인데 max_points가 없을 때 쓰는 점 개수 (1년치 일자 수 정도)
+DEFAULT_LTTB_POINTS = 366
+_RESAMPLE_RULES = {"week": "W-MON", "month": "MS"}
+
+
+def choose_granularity(series, max_points):
+    if series.empty:
+        return "day"
+    dates = pd.to_datetime(series.index)
+    span_days = (dates.max() - dates.min()).days + 1
+    if len(series) <= max_points:
+        return "day"
+    if span_days / 7 <= max_points:
+        return "week"
+    return "month"
+
+
+def bucket_series(series, granularity):
+    """일자별 합계를 주(월요일 시작)/월 단위 합계로 묶고 구간 시작일(YYYY-MM-DD)을 인덱스로 반환"""
+    if series.empty or granularity == "day":
+        return series
+    temp = series.copy()
+    temp.index = pd.to_datetime(temp.index)
+    rule = _RESAMPLE_RULES[granularity]
+    if granularity == "week":
+        bucketed = temp.resample(rule, label="left", closed="left").sum()
+    else:
+        bucketed = temp.resample(rule).sum()
+    bucketed.index = bucketed.index.strftime("%Y-%m-%d")
+    return bucketed
+
+
+def lttb(series, max_points):
+    """Largest-Triangle-Three-Buckets: 모양을 유지하면서 max_points개의 실제 점만 남김"""
+    n = len(series)
+    if max_points >= n or max_points < 3:
+        return series
+    x = pd.to_datetime(series.index).asi8.astype(float)
+    y = series.to_numpy(dtype=float)
+    keep = [0]
+    every = (n - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep.append(a)
+    keep.append(n - 1)
+    return series.iloc[keep]
+
+
+def downsample_series(series, max_points=None, granularity="auto"):
+    """
+    차트용 시계열을 max_points개 이하로 축소
+
+    granularity: auto(일/주/월 중 자동 선택) | day | week | month | lttb
+    lttb는 max_points가 없으면 DEFAULT_LTTB_POINTS개로 샘플링합니다.
+    반환: (축소된 Series, 실제 적용된 granularity)
+    """
+    if granularity not in ("auto", "lttb") + GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if granularity == "lttb":
+        return lttb(series, max_points or DEFAULT_LTTB_POINTS), "lttb"
+    if granularity == "auto":
+        if not max_points:
+            return series, "day"
+        granularity = choose_granularity(series, max_points)
+    bucketed = bucket_series(series, granularity)
+    if max_points and len(bucketed) > max_points:
+        return lttb(bucketed, max_points), "lttb"
+    return bucketed, granularity
+
+
+def items_to_df(receipts):
+    """영수증 목록의 items를 품목 단위 행(receipt, date, name, qty, price)으로 펼침"""
+    rows = []
+    for receipt_no, r in enumerate(receipts):
+        for item in r.get("items") or []:
+            rows.append((receipt_no, r["date"], str(item["name"]).strip(), int(item.get("qty") or 1), int(item["price"])))
+    df = pd.DataFrame(rows, columns=["receipt", "date", "name", "qty", "price"])
+    df["date"] = df["date"].astype("category")
+    df["name"] = df["name"].astype("category")
+    return df
+
+
+def _period_codes(dates, freq):
+    # 날짜 Categorical의 카테고리(고유 날짜)만 변환한 뒤 코드로 펼쳐 행 단위 문자열 연산을 피함
+    categories = pd.to_datetime(pd.Series(dates.cat.categories, dtype=object))
+    if freq == "month":
+        labels = categories.dt.strftime("%Y-%m")
+    elif freq == "week":
+        labels = (categories - pd.to_timedelta(categories.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d")
+    else:
+        labels = categories.dt.strftime("%Y-%m-%d")
+    label_codes, uniques = pd.factorize(labels)
+    return label_codes[dates.cat.codes.to_numpy()], uniques
+
+
+def calc_top_items(items, n=10):
+    """지출액 상위 품목 (지출액, 수량, 품목 행 수)"""
+    if items.empty:
+        return pd.DataFrame(columns=["name", "spend", "qty", "lines"])
+    # 품목명 Categorical 코드 위에서 bincount로 집계 (groupby보다 수 배 빠름)
+    codes = items["name"].cat.codes.to_numpy()
+    k = len(items["name"].cat.categories)
+    qty = items["qty"].to_numpy()
+    spend = np.bincount(codes, weights=qty * items["price"].to_numpy(), minlength=k)
+    total_qty = np.bincount(codes, weights=qty, minlength=k)
+    lines = np.bincount(codes, minlength=k)
+
+    present = np.flatnonzero(lines)
+    top = present[np.argsort(-spend[present], kind="stable")[:n]]
+    return pd.DataFrame({
+        "name": np.asarray(items["name"].cat.categories)[top],
+        "spend": spend[top].astype(np.int64),
+        "qty": total_qty[top].astype(np.int64),
+        "lines": lines[top],
+    })
+
+
+def calc_unit_price_trend(items, freq="month", name=None):
+    """기간별 수량 가중 평균 단가 (name을 주면 해당 품목만)"""
+    if name is not None and not items.empty:
+        items = items[items["name"] == name]
+    if items.empty:
+        return pd.Series(dtype=float)
+    codes, labels = _period_codes(items["date"], freq)
+    qty = items["qty"].to_numpy()
+    spend = qty * items["price"].to_numpy()
+    total_qty = np.bincount(codes, weights=qty, minlength=len(labels))
+    total_spend = np.bincount(codes, weights=spend, minlength=len(labels))
+    present = total_qty > 0
+    trend = pd.Series(total_spend[present] / total_qty[present], index=np.asarray(labels)[present])
+    return trend.sort_index()
+
+
+def calc_basket_size(items):
+    """영수증당 총 수량별 영수증 수"""
+    if items.empty:
+        return pd.Series(dtype=int)
+    receipt = items["receipt"].to_numpy()
+    present = np.bincount(receipt) > 0
+    sizes = np.bincount(receipt, weights=items["qty"].to_numpy())[present].astype(np.int64)
+    counts = np.bincount(sizes)
+    sizes_present = np.flatnonzero(counts)
+    return pd.Series(counts[sizes_present], index=sizes_present)
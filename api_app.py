@@ -1,28 +1,98 @@
 from __future__ import annotations
 
-import uuid
+import logging
+import os
+import threading
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterator, List, Literal, Optional, get_args
 
-from fastapi import FastAPI, Query
+from fastapi import Body, Depends, FastAPI, File, Header, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 
-from schemas import Receipt, ReceiptCreate, ReceiptStats
-from analytics import to_df, calc_daily, calc_category, calc_top_category, calc_total
+from alerts import TOTAL_BUDGET
+from analytics import calc_basket_size, calc_top_items, calc_unit_price_trend
+from dedup import DuplicateReceiptError
+from extraction import fallback_extract, llm_extract
+from schemas import (
+    Alert, BudgetStatus, Category, DedupResult, ExtractRequest, ExtractResult, ImportResult, ItemStats, Receipt,
+    ReceiptCreate, ReceiptStats,
+)
+from receipt_io import DEFAULT_BATCH_SIZE, ImportReport, detect_format, iter_export, iter_import_batches
+from store import DEFAULT_MAX_PARTITIONS, ReceiptStore, TenantStore
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Receipt Analyzer API")
 
-DB: List[Receipt] = []
+DB = TenantStore(
+    max_partitions=int(os.getenv("RECEIPT_MAX_PARTITIONS", DEFAULT_MAX_PARTITIONS)),
+    spill_dir=os.getenv("RECEIPT_SPILL_DIR"),
+)
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+BUDGET_KEYS = set(get_args(Category)) | {TOTAL_BUDGET}
+
+_llm_client = None
+_llm_lock = threading.Lock()
+
+
+def get_store(x_user_id: Optional[str] = Header(None)) -> Iterator[ReceiptStore]:
+    """X-User-Id 헤더의 파티션을 요청이 끝날 때까지 고정해서 넘김 (헤더가 없으면 default)"""
+    with DB.use(x_user_id) as store:
+        yield store
+
+
+def get_llm_client():
+    """
+    OPENAI_API_KEY가 있으면 프로세스 전체가 공유하는 OpenAI 클라이언트, 없으면 None
+
+    OPENAI_BASE_URL을 바꾸면 로컬 가짜 서버(fake_openai.py)로 부하 테스트를 할 수 있습니다.
+    """
+    global _llm_client
+    if _llm_client is None and os.getenv("OPENAI_API_KEY"):
+        import openai
+
+        with _llm_lock:
+            if _llm_client is None:
+                _llm_client = openai.OpenAI(
+                    max_retries=int(os.getenv("OPENAI_MAX_RETRIES", 2)),
+                    timeout=float(os.getenv("OPENAI_TIMEOUT", 30)),
+                )
+    return _llm_client
 
 
 @app.post("/api/receipts", response_model=Receipt)
-def create_receipt(payload: ReceiptCreate):
-    receipt = Receipt(
-        id=str(uuid.uuid4()),
-        created_at=datetime.utcnow(),
-        **payload.model_dump()
-    )
-    DB.append(receipt)
-    return receipt
+def create_receipt(
+    payload: ReceiptCreate,
+    on_duplicate: Optional[Literal["reject", "flag", "allow"]] = Query(None),
+    store: ReceiptStore = Depends(get_store),
+):
+    """사용자는 X-User-Id 헤더로만 정함. 본문의 user_id는 무시하고 저장 시 파티션 사용자로 덮어씀"""
+    try:
+        return store.add(payload, on_duplicate)
+    except DuplicateReceiptError as exc:
+        raise HTTPException(status_code=409, detail={"message": str(exc), **exc.match.to_dict()})
+
+
+@app.post("/api/receipts/extract", response_model=ExtractResult)
+def extract_receipt(payload: ExtractRequest, client=Depends(get_llm_client)):
+    """LLM으로 필드를 추출하고, 클라이언트가 없거나 호출이 실패하면 로컬 추출로 대체"""
+    error = "OPENAI_API_KEY is not set"
+    if client is not None:
+        try:
+            result = llm_extract(client, payload.text)
+            if result is not None:
+                return ExtractResult(**result, extractor="llm")
+            error = "LLM response was not valid JSON"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            logger.warning("LLM extraction failed, using fallback: %s", error)
+    return ExtractResult(**fallback_extract(payload.text), extractor="fallback", error=error)
 
 
 @app.get("/api/receipts", response_model=List[Receipt])
@@ -30,39 +100,140 @@ def list_receipts(
     from_date: Optional[str] = Query(None),
     to_date: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Search store names, item names and raw text"),
+    limit: Optional[int] = Query(None, ge=1),
+    order: Literal["asc", "desc"] = Query("asc", description="Insertion order; ignored when q ranks results"),
+    store: ReceiptStore = Depends(get_store),
+):
+    if order == "desc" and limit and not (q or from_date or to_date or category):
+        # 최근 limit건만 꺼냄 (전체 행 목록을 복사하지 않음)
+        return store.latest(limit)
+    data = store.query(from_date, to_date, category, q=q, limit=limit if q else None)
+    if order == "desc" and not q:
+        data.reverse()
+    return data[:limit] if limit else data
+
+
+@app.get("/api/receipts/export")
+def export_receipts(
+    format: Literal["csv", "parquet"] = Query("csv"),
+    from_date: Optional[str] = Query(None),
+    to_date: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100_000),
+    store: ReceiptStore = Depends(get_store),
+):
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    rows = store.query(from_date, to_date, category)
+    filename = f"receipts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        iter_export(store.iter_batches(batch_size, rows), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/api/receipts/import", response_model=ImportResult)
+def import_receipts(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "parquet", "jsonl"]] = Query(None),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100_000),
+    on_duplicate: Optional[Literal["reject", "flag", "allow"]] = Query(None),
+    store: ReceiptStore = Depends(get_store),
 ):
-    data = DB
-    if from_date:
-        data = [r for r in data if r.date >= from_date]
-    if to_date:
-        data = [r for r in data if r.date <= to_date]
-    if category:
-        data = [r for r in data if r.category == category]
-    return data
+    fmt = format or detect_format(file.filename)
+    report = ImportReport()
+    try:
+        for batch in iter_import_batches(file.file, fmt, batch_size, report):
+            added = store.add_many(batch, on_duplicate)
+            report.imported += len(added)
+            report.rejected += len(batch) - len(added)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return ImportResult(imported=report.imported, rejected=report.rejected, errors=report.errors)
+
+
+@app.post("/api/receipts/dedup", response_model=DedupResult)
+def dedup_receipts(
+    mode: Literal["reject", "flag"] = Query("reject"),
+    store: ReceiptStore = Depends(get_store),
+):
+    duplicates = store.dedup_backfill(mode)
+    return DedupResult(mode=mode, duplicates=duplicates, remaining=len(store))
 
 
 @app.get("/api/receipts/stats", response_model=ReceiptStats)
 def get_stats(
     from_date: Optional[str] = Query(None),
     to_date: Optional[str] = Query(None),
+    granularity: Literal["auto", "day", "week", "month", "lttb"] = Query("auto"),
+    max_points: Optional[int] = Query(None, ge=3, le=10_000, description="Upper bound on daily_series length; lttb defaults to 366"),
+    store: ReceiptStore = Depends(get_store),
+):
+    stats = store.stats(from_date, to_date, max_points=max_points, granularity=granularity)
+    return ReceiptStats(**stats)
+
+
+@app.get("/api/receipts/items/stats", response_model=ItemStats)
+def get_item_stats(
+    from_date: Optional[str] = Query(None),
+    to_date: Optional[str] = Query(None),
+    top_n: int = Query(10, ge=1, le=1000),
+    freq: Literal["day", "week", "month"] = Query("month"),
+    item: Optional[str] = Query(None, description="Unit price trend for this item name only"),
+    store: ReceiptStore = Depends(get_store),
 ):
-    data = DB
-    if from_date:
-        data = [r for r in data if r.date >= from_date]
-    if to_date:
-        data = [r for r in data if r.date <= to_date]
-
-    df = to_df([r.model_dump() for r in data])
-    total_amount = calc_total(df)
-    top_category, _ = calc_top_category(df)
-
-    daily_series = calc_daily(df).reset_index().rename(columns={"date": "date", "amount": "amount"}).to_dict(orient="records")
-    category_series = calc_category(df).reset_index().rename(columns={"category": "category", "amount": "amount"}).to_dict(orient="records")
-
-    return ReceiptStats(
-        total_amount=total_amount,
-        count=len(df),
-        top_category=top_category,
-        daily_series=daily_series,
-        category_series=category_series,
+    items = store.item_frame(from_date, to_date)
+    top_items = calc_top_items(items, top_n)
+    unit_price = calc_unit_price_trend(items, freq, item)
+    basket = calc_basket_size(items)
+
+    return ItemStats(
+        line_items=len(items),
+        top_items=[
+            {"name": r.name, "spend": int(r.spend), "qty": int(r.qty), "lines": int(r.lines)}
+            for r in top_items.itertuples(index=False)
+        ],
+        unit_price_series=[{"period": p, "avg_unit_price": round(float(v), 2)} for p, v in unit_price.items()],
+        basket_size=[{"size": int(k), "count": int(v)} for k, v in basket.items()],
     )
+
+
+@app.get("/api/alerts", response_model=List[Alert])
+def list_alerts(
+    kind: Optional[Literal["outlier", "budget"]] = Query(None),
+    receipt_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    store: ReceiptStore = Depends(get_store),
+):
+    """저장 시점에 만들어진 알림을 최신순으로 반환 (재계산 없음)"""
+    return store.recent_alerts(limit, kind, receipt_id)
+
+
+@app.get("/api/budgets", response_model=BudgetStatus)
+def get_budgets(
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="YYYY-MM; defaults to the latest month"),
+    store: ReceiptStore = Depends(get_store),
+):
+    return BudgetStatus(**store.budget_status(month))
+
+
+@app.put("/api/budgets", response_model=BudgetStatus)
+def set_budgets(
+    budgets: Dict[str, Optional[int]] = Body(..., examples=[{"식비": 300000, "total": 1000000}]),
+    store: ReceiptStore = Depends(get_store),
+):
+    """카테고리(또는 total)별 월 예산 설정. 0이나 null이면 삭제"""
+    unknown = sorted(set(budgets) - BUDGET_KEYS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown budget keys: {', '.join(unknown)}")
+    if any(v is not None and v < 0 for v in budgets.values()):
+        raise HTTPException(status_code=400, detail="Budgets must be non-negative")
+    return BudgetStatus(**store.set_budgets(budgets))
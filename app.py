@@ -10,11 +10,21 @@ import locale
 import logging
 import warnings
 import traceback
-import re
 import time
+import io
 import plotly.express as px
 from dotenv import load_dotenv
-from analytics import to_df, calc_daily, calc_category, calc_monthly, calc_top_category
+from analytics import to_df, calc_daily, calc_category, calc_monthly, calc_top_category, downsample_series
+from alerts import TOTAL_BUDGET, AlertEngine
+from backend import DEFAULT_ALERT_LIMIT, DEFAULT_LIST_LIMIT, make_backend
+from dedup import DedupIndex, DuplicateReceiptError
+from extraction import CATEGORY_MAP, MODEL, SYSTEM_PROMPT, build_prompt, fallback_extract, map_category, strip_code_fence
+from receipt_io import DEFAULT_BATCH_SIZE, ImportReport, detect_format, iter_export, iter_import_batches
+
+EXPORT_MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+CHART_MAX_POINTS = 366
+GRANULARITY_LABELS = {"day": "일자별", "week": "주별", "month": "월별", "lttb": "일자별(샘플링)"}
+ALERT_PREVIEW = 3
 
 # 모든 경고 무시
 warnings.filterwarnings('ignore')
@@ -43,6 +53,9 @@ for logger_name in ['openai', 'httpx', 'httpcore', 'urllib3', 'asyncio']:
 # .env 파일 로드
 load_dotenv()
 
+# 영수증 저장 위치: session(세션별 목록, 기본값) | local(api_app 저장소 공유) | http(API 서버)
+BACKEND_MODE = os.getenv("RECEIPT_BACKEND", "session").strip().lower()
+
 # OpenAI 환경 변수 검증 (ASCII-only)
 startup_warnings = []
 
@@ -103,45 +116,6 @@ def extract_receipt_info(receipt_text):
         except Exception:
             pass
 
-    def fallback_extract(text):
-        # Basic fallback parsing without external calls.
-        text = str(text)
-        date_match = re.search(r"(\d{4})[-./](\d{1,2})[-./](\d{1,2})", text)
-        if date_match:
-            yyyy, mm, dd = date_match.groups()
-            date = f"{yyyy}-{int(mm):02d}-{int(dd):02d}"
-        else:
-            date = datetime.now().strftime('%Y-%m-%d')
-
-        numbers = re.findall(r"\d{1,3}(?:,\d{3})+|\d+", text)
-        amounts = [int(n.replace(",", "")) for n in numbers] if numbers else [0]
-        amount = max(amounts) if amounts else 0
-
-        first_line = text.strip().splitlines()[0] if text.strip() else "Unknown"
-        store = first_line.strip() if first_line else "Unknown"
-
-        category = "other"
-        lower = text.lower()
-        if any(k in lower for k in ["coffee", "cafe", "meal", "food", "restaurant", "dining"]):
-            category = "food"
-        elif any(k in lower for k in ["bus", "subway", "taxi", "transport", "train"]):
-            category = "transport"
-        elif any(k in lower for k in ["mall", "shop", "store", "clothing", "market"]):
-            category = "shopping"
-        elif any(k in lower for k in ["movie", "cinema", "game", "entertain"]):
-            category = "entertainment"
-        elif any(k in lower for k in ["pharmacy", "hospital", "clinic", "medical"]):
-            category = "medical"
-        elif any(k in lower for k in ["school", "academy", "education", "course"]):
-            category = "education"
-
-        return {
-            "date": date,
-            "store": store or "Unknown",
-            "amount": amount,
-            "category": category
-        }
-
     try:
         if client is None:
             st.error("OpenAI API 키 또는 관련 환경 변수에 문제가 있어 로컬 추출로 전환합니다.")
@@ -149,35 +123,11 @@ def extract_receipt_info(receipt_text):
         # 문자열로 변환
         receipt_text = str(receipt_text)
         
-        prompt = f"""
-    Extract the following fields from the receipt text.
-    Respond ONLY in JSON with the exact keys and no extra text.
-
-    Receipt text:
-    {receipt_text}
-
-    Fields to extract:
-    - date: YYYY-MM-DD (use today's date if missing)
-    - store: store name
-    - amount: number only (use 0 if missing)
-    - category: one of food, transport, shopping, entertainment, medical, education, other
-
-    JSON format:
-    {{
-        "date": "YYYY-MM-DD",
-        "store": "store name",
-        "amount": 0,
-        "category": "food"
-    }}
-    """
-        
-        system_content = "You extract receipt fields and always return JSON only."
-        
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=MODEL,
             messages=[
-                {"role": "system", "content": system_content},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_prompt(receipt_text)}
             ],
             temperature=0.3,
             max_tokens=500,
@@ -188,15 +138,7 @@ def extract_receipt_info(receipt_text):
         
         # JSON 파싱 시도
         try:
-            # 코드 블록으로 감싸져 있을 수 있으므로 처리
-            if result_text.startswith("```json"):
-                result_text = result_text[7:]
-            if result_text.startswith("```"):
-                result_text = result_text[3:]
-            if result_text.endswith("```"):
-                result_text = result_text[:-3]
-            
-            result = json.loads(result_text.strip())
+            result = json.loads(strip_code_fence(result_text))
             
         except json.JSONDecodeError as je:
             st.error(f"❌ AI 응답을 JSON으로 파싱할 수 없습니다: {str(je)}")
@@ -235,17 +177,7 @@ def extract_receipt_info(receipt_text):
             result['category'] = "기타"
             st.info("ℹ️ 카테고리 정보가 없어 '기타'로 설정되었습니다.")
         else:
-            category_map = {
-                "food": "식비",
-                "transport": "교통비",
-                "shopping": "쇼핑",
-                "entertainment": "엔터테인먼트",
-                "medical": "의료",
-                "education": "교육",
-                "other": "기타"
-            }
-            category_key = str(result['category']).strip().lower()
-            result['category'] = category_map.get(category_key, result['category'])
+            result['category'] = map_category(result['category'])
         
         # 5. amount가 숫자인지 확인
         try:
@@ -266,6 +198,231 @@ def extract_receipt_info(receipt_text):
         st.error("Unexpected error. Using local fallback extraction.")
         return fallback_extract(receipt_text)
 
+def export_receipts_file(receipts, fmt):
+    """
+    영수증 목록을 DataFrame 변환 없이 배치 단위로 직렬화
+
+    Args:
+        receipts: 영수증 목록
+        fmt: "csv" 또는 "parquet"
+
+    Returns:
+        io.BytesIO: 다운로드 버튼에 넘길 파일 객체
+    """
+    batches = (receipts[i:i + DEFAULT_BATCH_SIZE] for i in range(0, len(receipts), DEFAULT_BATCH_SIZE))
+    return build_export_file(iter_export(batches, fmt))
+
+
+def build_export_file(chunks):
+    buf = io.BytesIO()
+    for chunk in chunks:
+        buf.write(chunk)
+    buf.seek(0)
+    return buf
+
+
+def render_export(make_file, key):
+    """
+    형식 선택 + 파일 만들기 + 다운로드 버튼
+
+    st.download_button은 완성된 파일 데이터를 받아야 하므로 스트리밍할 수 없습니다.
+    그래서 버튼을 눌렀을 때만 파일을 만들고, 내려받으면 바로 session_state에서 지웁니다
+    (매 rerun마다 전체 파일을 다시 만들지 않음).
+
+    Args:
+        make_file: fmt -> 파일 객체(BytesIO)를 만드는 함수
+        key: 위젯 key 접두어
+    """
+    state_key = f"{key}_file"
+    col_dl1, col_dl2 = st.columns([2, 8])
+    with col_dl1:
+        export_format = st.selectbox("파일 형식", ["csv", "parquet"], key=f"{key}_format")
+    with col_dl2:
+        ready = st.session_state.get(state_key)
+        if ready is not None and ready[0] != export_format:
+            st.session_state.pop(state_key, None)
+            ready = None
+        if ready is None:
+            if st.button(f"📦 {export_format.upper()} 파일 만들기", use_container_width=True, key=f"{key}_build"):
+                try:
+                    st.session_state[state_key] = (export_format, make_file(export_format))
+                except RuntimeError as exc:
+                    st.warning(f"⚠️ {exc}")
+                else:
+                    st.rerun()
+        else:
+            st.download_button(
+                label=f"📥 {export_format.upper()} 다운로드",
+                data=ready[1],
+                file_name=f"receipts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}",
+                mime=EXPORT_MIME_TYPES[export_format],
+                use_container_width=True,
+                key=f"{key}_download",
+                on_click=lambda: st.session_state.pop(state_key, None),
+            )
+
+
+def import_receipts_file(uploaded_file):
+    """
+    업로드된 CSV/Parquet/JSONL 파일을 배치 단위로 검증하여 session_state에 추가
+
+    Returns:
+        ImportReport: 추가/거부 건수
+    """
+    fmt = detect_format(uploaded_file.name)
+    report = ImportReport()
+    for batch in iter_import_batches(uploaded_file, fmt, DEFAULT_BATCH_SIZE, report):
+        for receipt in batch:
+            row = receipt.model_dump()
+            if st.session_state.dedup.check_and_add(row) is not None:
+                report.rejected += 1
+                continue
+            st.session_state.receipts.append(row)
+            st.session_state.alerts.observe(row)
+            report.imported += 1
+    return report
+
+
+def render_alerts(alerts):
+    """저장 시점에 만들어진 이상 지출/예산 초과 알림(최신순) 표시"""
+    if not alerts:
+        return
+    st.subheader("🚨 지출 알림")
+    for alert in alerts[:ALERT_PREVIEW]:
+        icon = "💸" if alert["kind"] == "budget" else "⚠️"
+        st.warning(f"{icon} {alert['message']} ({alert['date']})")
+    if len(alerts) > ALERT_PREVIEW:
+        with st.expander(f"이전 알림 {len(alerts) - ALERT_PREVIEW}건"):
+            older = pd.DataFrame(alerts[ALERT_PREVIEW:])[['date', 'kind', 'message']]
+            older.columns = ['📅 날짜', '종류', '내용']
+            st.dataframe(older, use_container_width=True, hide_index=True)
+
+
+def render_budget_form(budgets):
+    """
+    월 예산 입력 폼 (0이면 예산 없음)
+
+    Returns:
+        dict | None: 저장 버튼을 누르면 {카테고리 또는 total: 예산}, 아니면 None
+    """
+    with st.expander("💰 월 예산"):
+        with st.form("budget_form"):
+            values = {}
+            for key, label in [(TOTAL_BUDGET, "전체")] + [(c, c) for c in CATEGORY_MAP.values()]:
+                values[key] = st.number_input(
+                    label, min_value=0, step=10000, value=int(budgets.get(key, 0)), key=f"budget_{key}"
+                )
+            if st.form_submit_button("저장", use_container_width=True):
+                return values
+    return None
+
+
+def render_backend_dashboard(backend):
+    """
+    공유 저장소 모드 대시보드
+
+    원본 행 대신 저장소가 미리 집계한 통계(일자별/카테고리별 합계)만 받아 차트를 그리므로
+    렌더링 비용이 영수증 건수와 무관합니다. 데이터 테이블은 최근 영수증 일부만 조회하고(정렬도 그 안에서만),
+    전체 목록은 파일 만들기 버튼을 눌렀을 때만 저장소에서 배치 단위로 받아 옵니다.
+    """
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    # 월 단위로 묶은 통계 (메트릭, 카테고리, 월별 탭에 사용)
+    stats = backend.stats(granularity="month")
+    if stats["count"] == 0:
+        st.info("📝 왼쪽 사이드바에서 영수증을 입력하고 분석해보세요!")
+        return
+    month_stats = backend.stats(from_date=now.strftime('%Y-%m-01'), to_date=today)
+    today_stats = backend.stats(from_date=today, to_date=today)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label="💵 전체 총 지출", value=f"{stats['total_amount']:,}원", delta=f"{stats['count']}건")
+    with col2:
+        st.metric(label="💳 이번 달 지출", value=f"{month_stats['total_amount']:,}원", delta=f"{month_stats['count']}건")
+    with col3:
+        top = stats["category_series"][0]
+        st.metric(label="🏆 최다 카테고리", value=top["category"], delta=f"{top['amount']:,}원")
+    with col4:
+        st.metric(
+            label="📅 오늘 등록",
+            value=f"{today_stats['count']}건",
+            delta=f"{today_stats['total_amount']:,}원" if today_stats['count'] > 0 else None
+        )
+
+    render_alerts(backend.alerts())
+    st.divider()
+
+    chart_stats = backend.stats(max_points=CHART_MAX_POINTS)
+    daily_df = pd.DataFrame(chart_stats["daily_series"], columns=["date", "amount"])
+    category_df = pd.DataFrame(stats["category_series"], columns=["category", "amount"])
+    # (월, 카테고리)별 합계/건수: 카테고리 상세, 월별 표, 월별 카테고리 분석에 사용
+    monthly_df = pd.DataFrame(stats["monthly_series"], columns=["month", "category", "amount", "count"])
+
+    tab1, tab2, tab3 = st.tabs(["📊 차트", "📋 최근 영수증", "📈 월별 통계"])
+
+    with tab1:
+        col_chart1, col_chart2 = st.columns(2)
+        with col_chart1:
+            st.subheader("🍰 카테고리별 지출 비율")
+            fig_pie = px.pie(category_df, names='category', values='amount', hole=0.4)
+            fig_pie.update_layout(margin=dict(t=10, b=10, l=10, r=10))
+            st.plotly_chart(fig_pie, use_container_width=True)
+
+            st.markdown("#### 📂 카테고리 상세")
+            category_counts = monthly_df.groupby('category')['count'].sum()
+            for row in stats["category_series"]:
+                st.markdown(f"**{row['category']}**: {row['amount']:,}원 ({int(category_counts.get(row['category'], 0))}건)")
+        with col_chart2:
+            st.subheader(f"📈 {GRANULARITY_LABELS.get(chart_stats['granularity'], '일자별')} 지출 추이")
+            fig_line = px.line(daily_df, x='date', y='amount', markers=True, color_discrete_sequence=["#A7C7E7"])
+            fig_line.update_layout(margin=dict(t=10, b=10, l=10, r=10), xaxis_title="Date", yaxis_title="Amount")
+            st.plotly_chart(fig_line, use_container_width=True)
+
+    with tab2:
+        st.subheader(f"📋 최근 영수증 (최대 {DEFAULT_LIST_LIMIT:,}건)")
+        recent_df = pd.DataFrame(backend.list(DEFAULT_LIST_LIMIT))
+        if not recent_df.empty:
+            # 정렬은 불러온 최근 영수증 안에서만 적용 (전체 목록은 아래 파일로 내려받기)
+            col_sort1, col_sort2, col_sort3 = st.columns([2, 2, 6])
+            with col_sort1:
+                sort_by = st.selectbox("정렬 기준", ["날짜", "금액", "카테고리", "상호명"], key="backend_sort_by")
+            with col_sort2:
+                sort_order = st.selectbox("정렬 순서", ["내림차순", "오름차순"], key="backend_sort_order")
+            sort_column_map = {"날짜": "date", "금액": "amount", "카테고리": "category", "상호명": "store"}
+            recent_df = recent_df.sort_values(
+                by=sort_column_map[sort_by], ascending=(sort_order == "오름차순"), kind="stable"
+            )
+            recent_df = recent_df[['date', 'store', 'amount', 'category']]
+            recent_df.columns = ['📅 날짜', '🏪 상호명', '💰 금액', '📂 카테고리']
+            st.dataframe(recent_df, use_container_width=True, height=400)
+
+        # 다운로드 (요청할 때만 저장소 전체를 배치 단위로 받아 기록)
+        render_export(lambda fmt: build_export_file(backend.export(fmt)), key="backend_export")
+
+    with tab3:
+        st.subheader("📈 월별 지출 분석")
+        if not monthly_df.empty:
+            monthly_sum = monthly_df.groupby('month')[['amount', 'count']].sum().sort_index(ascending=False)
+            monthly_sum['mean'] = monthly_sum['amount'] / monthly_sum['count']
+            monthly_sum.columns = ['총 지출', '건수', '평균 지출']
+            monthly_table = monthly_sum.copy()
+            monthly_table['총 지출'] = monthly_table['총 지출'].apply(lambda x: f"{x:,}원")
+            monthly_table['평균 지출'] = monthly_table['평균 지출'].apply(lambda x: f"{x:,.0f}원")
+            st.dataframe(monthly_table, use_container_width=True)
+
+            st.subheader("📊 월별 지출 추이")
+            st.bar_chart(monthly_sum['총 지출'].sort_index())
+
+            st.subheader("📂 월별 카테고리 분석")
+            pivot_table = monthly_df.pivot_table(
+                values='amount', index='month', columns='category', aggfunc='sum', fill_value=0
+            ).sort_index(ascending=False)
+            for col in pivot_table.columns:
+                pivot_table[col] = pivot_table[col].apply(lambda x: f"{x:,}원" if x > 0 else "-")
+            st.dataframe(pivot_table, use_container_width=True)
+
+
 def main():
     st.set_page_config(
         page_title="영수증 분석 앱",
@@ -283,9 +440,19 @@ def main():
     # session_state 초기화
     if 'receipts' not in st.session_state:
         st.session_state.receipts = []
+    if 'dedup' not in st.session_state:
+        st.session_state.dedup = DedupIndex()
+    if 'alerts' not in st.session_state:
+        st.session_state.alerts = AlertEngine()
     
     # 사이드바 - 영수증 입력
     with st.sidebar:
+        # 공유 저장소 모드 (RECEIPT_BACKEND=local|http)
+        backend = None
+        if BACKEND_MODE != "session":
+            user_id = st.text_input("👤 사용자 ID", value=os.getenv("RECEIPT_USER_ID", "default"), key="user_id")
+            backend = make_backend(BACKEND_MODE, user_id=user_id.strip() or None)
+
         st.header("📝 영수증 입력")
 
         # 초기화 요청 처리 (위젯 생성 전에 수행)
@@ -334,6 +501,7 @@ def main():
                     result = extract_receipt_info(receipt_text)
 
                     if result:
+                        result['raw_text'] = receipt_text
                         st.session_state.analysis_result = result
                         success_placeholder = st.empty()
                         success_placeholder.success("✅ 분석 완료!")
@@ -353,22 +521,82 @@ def main():
             
             # 추가 버튼
             if st.button("➕ 리스트에 추가", use_container_width=True, type="primary", key="add_btn"):
-                st.session_state.receipts.append(result)
-                st.session_state.clear_form = True
-                st.session_state.analysis_result = None
-                st.success("✅ 리스트에 추가되었습니다!")
-                st.rerun()
+                # 같은 영수증을 두 번 붙여넣은 경우 집계가 부풀려지지 않도록 거부
+                added = False
+                if backend is not None:
+                    try:
+                        backend.add(result)
+                        added = True
+                    except DuplicateReceiptError:
+                        st.warning("⚠️ 이미 추가된 영수증과 같은 내용이라 추가하지 않았습니다.")
+                    except Exception as exc:
+                        st.error(f"❌ 저장 실패: {exc}")
+                elif st.session_state.dedup.check_and_add(result) is not None:
+                    st.warning("⚠️ 이미 추가된 영수증과 같은 내용이라 추가하지 않았습니다.")
+                else:
+                    st.session_state.receipts.append(result)
+                    st.session_state.alerts.observe(result)
+                    added = True
+                if added:
+                    st.session_state.clear_form = True
+                    st.session_state.analysis_result = None
+                    st.success("✅ 리스트에 추가되었습니다!")
+                    st.rerun()
         
         st.divider()
         
-        # 전체 삭제 버튼
-        if st.session_state.receipts:
+        # 파일 가져오기
+        with st.expander("📤 파일 가져오기"):
+            uploaded_file = st.file_uploader(
+                "CSV / Parquet / JSONL 파일",
+                type=["csv", "parquet", "jsonl"],
+                key="import_file"
+            )
+            if uploaded_file is not None and st.button("가져오기", use_container_width=True):
+                try:
+                    if backend is not None:
+                        report = backend.import_file(uploaded_file, uploaded_file.name)
+                    else:
+                        report = import_receipts_file(uploaded_file)
+                except Exception as exc:
+                    st.error(f"❌ 가져오기 실패: {exc}")
+                else:
+                    st.success(f"✅ {report.imported:,}건 추가 ({report.rejected:,}건 거부)")
+                    for err in report.errors[:5]:
+                        st.caption(err)
+
+        # 월 예산 (초과하면 저장 시점에 알림)
+        try:
+            current_budgets = backend.budgets()["budgets"] if backend is not None else st.session_state.alerts.budgets
+        except Exception:
+            current_budgets = {}
+        new_budgets = render_budget_form(current_budgets)
+        if new_budgets is not None:
+            try:
+                if backend is not None:
+                    backend.set_budgets(new_budgets)
+                else:
+                    st.session_state.alerts.set_budgets(new_budgets)
+            except Exception as exc:
+                st.error(f"❌ 예산 저장 실패: {exc}")
+            else:
+                st.success("✅ 예산이 저장되었습니다.")
+
+        # 전체 삭제 버튼 (공유 저장소 모드에서는 제공하지 않음)
+        if backend is None and st.session_state.receipts:
             if st.button("🗑️ 전체 삭제", use_container_width=True, type="secondary"):
                 st.session_state.receipts = []
+                st.session_state.dedup = DedupIndex()
+                st.session_state.alerts.clear()
                 st.rerun()
     
     # 메인 화면
-    if st.session_state.receipts:
+    if backend is not None:
+        try:
+            render_backend_dashboard(backend)
+        except Exception as exc:
+            st.error(f"❌ 저장소에 연결할 수 없습니다: {exc}")
+    elif st.session_state.receipts:
         # DataFrame 생성
         df = to_df(st.session_state.receipts)
         
@@ -423,6 +651,7 @@ def main():
                 delta=f"{today_amount:,}원" if today_count > 0 else None
             )
         
+        render_alerts([a.model_dump(mode="json") for a in st.session_state.alerts.alerts(DEFAULT_ALERT_LIMIT)])
         st.divider()
         
         # 차트와 테이블
@@ -458,9 +687,11 @@ def main():
                     st.markdown(f"**{cat}**: {amt:,}원 ({count}건)")
             
             with col_chart2:
-                st.subheader("📈 일자별 지출 추이")
                 daily_sum = calc_daily(df)
-                line_df = daily_sum.reset_index()
+                # 기간이 길면 주/월 단위로 묶어 차트 점 개수를 제한
+                chart_series, chart_granularity = downsample_series(daily_sum, CHART_MAX_POINTS)
+                st.subheader(f"📈 {GRANULARITY_LABELS.get(chart_granularity, '일자별')} 지출 추이")
+                line_df = chart_series.reset_index()
                 line_df.columns = ['date', 'amount']
                 fig_line = px.line(
                     line_df,
@@ -527,15 +758,8 @@ def main():
             with col_stat4:
                 st.metric("🔝 최고 지출", f"{df['amount'].max():,}원")
             
-            # CSV 다운로드 버튼
-            csv = df.to_csv(index=False, encoding='utf-8-sig')
-            st.download_button(
-                label="📥 CSV 다운로드",
-                data=csv,
-                file_name=f"receipts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+            # 다운로드 (요청할 때만 세션 목록에서 배치 단위로 기록)
+            render_export(lambda fmt: export_receipts_file(st.session_state.receipts, fmt), key="export")
         
         with tab3:
             st.subheader("📈 월별 지출 분석")
@@ -0,0 +1,186 @@
+"""
+Streamlit 대시보드용 공유 저장소 백엔드
+
+- local: 같은 프로세스의 api_app 저장소(TenantStore)와 집계를 그대로 사용
+- http: 실행 중인 API 서버에 연결 풀을 공유하는 httpx 클라이언트로 요청
+
+둘 다 차트용으로 미리 집계된 통계만 받아 오므로 화면 렌더링 비용이 영수증 건수와 무관합니다.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import IO, Dict, Iterator, List, Optional
+
+from dedup import DuplicateMatch, DuplicateReceiptError
+from schemas import ImportResult, ReceiptCreate
+
+BACKEND_MODES = ("session", "local", "http")
+DEFAULT_API_URL = "http://localhost:8000"
+DEFAULT_LIST_LIMIT = 1000
+DEFAULT_ALERT_LIMIT = 20
+
+_http_clients: Dict[str, "object"] = {}
+_http_lock = threading.Lock()
+
+
+def get_http_client(base_url: str):
+    """base_url마다 하나의 httpx.Client를 공유 (모든 세션이 연결 풀을 같이 씀)"""
+    import httpx
+
+    with _http_lock:
+        client = _http_clients.get(base_url)
+        if client is None:
+            client = _http_clients[base_url] = httpx.Client(
+                base_url=base_url,
+                timeout=httpx.Timeout(10.0, connect=3.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return client
+
+
+class LocalBackend:
+    """요청마다 api_app.DB에서 파티션을 고정해 사용 (파티션 객체를 붙잡아 두면 내려놓인 뒤 쓰기가 거부됨)"""
+
+    def __init__(self, user_id: Optional[str] = None):
+        import api_app
+
+        self.db = api_app.DB
+        self.user_id = user_id
+
+    def add(self, receipt: dict) -> dict:
+        with self.db.use(self.user_id) as store:
+            return store.add(ReceiptCreate(**receipt)).model_dump(mode="json")
+
+    def stats(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        max_points: Optional[int] = None,
+        granularity: str = "auto",
+    ) -> dict:
+        with self.db.use(self.user_id) as store:
+            return store.stats(from_date, to_date, max_points=max_points, granularity=granularity)
+
+    def list(self, limit: int = DEFAULT_LIST_LIMIT) -> List[dict]:
+        with self.db.use(self.user_id) as store:
+            return [r.model_dump(mode="json") for r in store.latest(limit)]
+
+    def import_file(self, fileobj: IO[bytes], filename: str) -> ImportResult:
+        from receipt_io import DEFAULT_BATCH_SIZE, ImportReport, detect_format, iter_import_batches
+
+        report = ImportReport()
+        with self.db.use(self.user_id) as store:
+            for batch in iter_import_batches(fileobj, detect_format(filename), DEFAULT_BATCH_SIZE, report):
+                added = store.add_many(batch)
+                report.imported += len(added)
+                report.rejected += len(batch) - len(added)
+        return ImportResult(imported=report.imported, rejected=report.rejected, errors=report.errors)
+
+    def export(self, fmt: str = "csv") -> Iterator[bytes]:
+        """현재 행 목록을 고정해 두고 배치 단위로 직렬화한 바이트 조각을 반환"""
+        from receipt_io import DEFAULT_BATCH_SIZE, iter_export
+
+        with self.db.use(self.user_id) as store:
+            rows = store.query()
+        return iter_export(store.iter_batches(DEFAULT_BATCH_SIZE, rows), fmt)
+
+    def alerts(self, limit: int = DEFAULT_ALERT_LIMIT) -> List[dict]:
+        with self.db.use(self.user_id) as store:
+            return [a.model_dump(mode="json") for a in store.recent_alerts(limit)]
+
+    def budgets(self) -> dict:
+        with self.db.use(self.user_id) as store:
+            return store.budget_status()
+
+    def set_budgets(self, budgets: Dict[str, Optional[int]]) -> dict:
+        with self.db.use(self.user_id) as store:
+            return store.set_budgets(budgets)
+
+
+class HttpBackend:
+    def __init__(self, base_url: str = DEFAULT_API_URL, user_id: Optional[str] = None, client=None):
+        self.client = client or get_http_client(base_url.rstrip("/"))
+        self.headers = {"X-User-Id": user_id} if user_id else {}
+
+    def add(self, receipt: dict) -> dict:
+        payload = ReceiptCreate(**receipt).model_dump(mode="json")
+        resp = self.client.post("/api/receipts", json=payload, headers=self.headers)
+        if resp.status_code == 409:
+            detail = resp.json().get("detail", {})
+            raise DuplicateReceiptError(
+                DuplicateMatch(detail.get("kind", "exact"), detail.get("receipt_id"), detail.get("similarity", 1.0))
+            )
+        resp.raise_for_status()
+        return resp.json()
+
+    def stats(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        max_points: Optional[int] = None,
+        granularity: str = "auto",
+    ) -> dict:
+        params = {"from_date": from_date, "to_date": to_date, "max_points": max_points, "granularity": granularity}
+        params = {k: v for k, v in params.items() if v}
+        resp = self.client.get("/api/receipts/stats", params=params, headers=self.headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    def list(self, limit: int = DEFAULT_LIST_LIMIT) -> List[dict]:
+        resp = self.client.get("/api/receipts", params={"limit": limit, "order": "desc"}, headers=self.headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    def import_file(self, fileobj: IO[bytes], filename: str) -> ImportResult:
+        resp = self.client.post(
+            "/api/receipts/import",
+            files={"file": (filename, fileobj)},
+            headers=self.headers,
+            timeout=None,
+        )
+        resp.raise_for_status()
+        return ImportResult(**resp.json())
+
+    def export(self, fmt: str = "csv") -> Iterator[bytes]:
+        """GET /api/receipts/export 응답을 받는 대로 조각 단위로 넘김"""
+        with self.client.stream(
+            "GET", "/api/receipts/export", params={"format": fmt}, headers=self.headers, timeout=None
+        ) as resp:
+            if resp.status_code == 501:
+                resp.read()
+                raise RuntimeError(resp.json().get("detail", f"{fmt} export is not supported by the server"))
+            resp.raise_for_status()
+            yield from resp.iter_bytes()
+
+    def alerts(self, limit: int = DEFAULT_ALERT_LIMIT) -> List[dict]:
+        resp = self.client.get("/api/alerts", params={"limit": limit}, headers=self.headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    def budgets(self) -> dict:
+        resp = self.client.get("/api/budgets", headers=self.headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    def set_budgets(self, budgets: Dict[str, Optional[int]]) -> dict:
+        resp = self.client.put("/api/budgets", json=budgets, headers=self.headers)
+        resp.raise_for_status()
+        return resp.json()
+
+
+def make_backend(mode: Optional[str] = None, user_id: Optional[str] = None, api_url: Optional[str] = None):
+    """
+    RECEIPT_BACKEND 환경 변수(session|local|http)에 따라 백엔드 생성
+
+    session이면 None을 반환하고, 앱은 기존처럼 st.session_state에 영수증을 보관합니다.
+    오타 등으로 알 수 없는 값이면 조용히 session으로 넘어가지 않고 ValueError를 냅니다.
+    """
+    mode = (mode or os.getenv("RECEIPT_BACKEND", "session")).strip().lower()
+    if mode not in BACKEND_MODES:
+        raise ValueError(f"RECEIPT_BACKEND must be one of {', '.join(BACKEND_MODES)}, got {mode!r}")
+    if mode == "local":
+        return LocalBackend(user_id)
+    if mode == "http":
+        return HttpBackend(api_url or os.getenv("RECEIPT_API_URL", DEFAULT_API_URL), user_id)
+    return None
@@ -0,0 +1,270 @@
+"""
+원본 영수증 텍스트 일괄 가져오기
+
+    python bulk_import.py dumps/2026-02-24/ --output receipts.jsonl
+    python bulk_import.py texts.jsonl --output receipts.jsonl --llm --llm-concurrency 4
+
+입력은 .txt 파일이 들어 있는 디렉터리 또는 한 줄에 하나씩 {"text": ...} (또는 문자열)이
+들어 있는 JSONL 파일입니다. 로컬 추출은 프로세스 풀에서 배치 단위로 실행하고, 신뢰도가
+낮은 행만 선택적으로 OpenAI에 다시 요청합니다. 결과는 배치마다 JSONL로 기록(또는
+--api-url 로 /api/receipts/import 에 업로드)하고, 체크포인트 파일에 진행 위치를 남겨
+중단 후 같은 명령으로 이어서 실행할 수 있습니다.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from extraction import fallback_extract_scored, llm_extract
+from schemas import ReceiptCreate
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_LLM_THRESHOLD = 0.6
+
+
+def iter_texts(source: str) -> Iterator[Tuple[str, str]]:
+    """(key, text) 쌍을 입력 순서대로 반환 (디렉터리는 파일명 정렬 순)"""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.endswith(".txt"):
+                continue
+            with open(os.path.join(source, name), encoding="utf-8-sig") as f:
+                yield name, f.read()
+        return
+    with open(source, encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield str(line_no), record
+            else:
+                yield str(record.get("id", line_no)), record.get("text") or record.get("raw_text") or ""
+
+
+def iter_batches(iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_batch(batch: List[Tuple[str, str]]) -> List[Tuple[str, str, dict, float]]:
+    # 프로세스 풀에서 실행되므로 모듈 최상위 함수여야 함
+    out = []
+    for key, text in batch:
+        result, confidence = fallback_extract_scored(text)
+        out.append((key, text, result, confidence))
+    return out
+
+
+def iter_parsed(pool, batches, window: int) -> Iterator[list]:
+    # executor.map은 입력을 한 번에 모두 제출하므로, 진행 중인 배치 수를 window로 제한
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(parse_batch, batch))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def load_checkpoint(path: Optional[str], source: str) -> Tuple[int, Optional[int]]:
+    """(처리한 입력 행 수, 그 시점의 출력 파일 크기)"""
+    if not path or not os.path.exists(path):
+        return 0, None
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("source") != os.path.abspath(source):
+        raise SystemExit(f"checkpoint {path} belongs to {state.get('source')}, not {source}")
+    return int(state.get("done", 0)), state.get("output_bytes")
+
+
+def save_checkpoint(path: Optional[str], source: str, done: int, output_bytes: Optional[int]):
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(source), "done": done, "output_bytes": output_bytes}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def default_checkpoint(source: str, output: Optional[str]) -> str:
+    """출력 파일 옆, --api-url만 쓸 때는 입력 경로(디렉터리면 그 이름) 옆에 둠"""
+    if output:
+        return output + ".ckpt"
+    return os.path.abspath(source).rstrip(os.sep) + ".ckpt"
+
+
+def make_openai_client():
+    from dotenv import load_dotenv
+    import openai
+
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise SystemExit("--llm requires OPENAI_API_KEY")
+    return openai.OpenAI(api_key=api_key, max_retries=2)
+
+
+class BatchWriter:
+    def __init__(
+        self,
+        output: Optional[str],
+        api_url: Optional[str],
+        resume_bytes: Optional[int] = None,
+        user_id: Optional[str] = None,
+    ):
+        self._file = None
+        if output:
+            self._file = open(output, "ab")
+            if resume_bytes is not None:
+                # 체크포인트 이후에 기록된 배치는 다시 처리되므로 잘라냄
+                self._file.truncate(resume_bytes)
+        self._http = None
+        self._api_url = api_url.rstrip("/") if api_url else None
+        if self._api_url:
+            import httpx
+
+            # 저장소는 X-User-Id 헤더로 사용자 파티션을 고름 (없으면 default)
+            self._http = httpx.Client(timeout=60.0, headers={"X-User-Id": user_id} if user_id else None)
+
+    def write(self, receipts: List[ReceiptCreate]):
+        lines = "".join(r.model_dump_json() + "\n" for r in receipts).encode("utf-8")
+        if self._file:
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        if self._http:
+            resp = self._http.post(
+                f"{self._api_url}/api/receipts/import",
+                params={"format": "jsonl"},
+                files={"file": ("batch.jsonl", lines, "application/x-ndjson")},
+            )
+            resp.raise_for_status()
+
+    def tell(self) -> Optional[int]:
+        return self._file.tell() if self._file else None
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        if self._http:
+            self._http.close()
+
+
+RECEIPT_FIELDS = ("date", "store", "amount", "category")
+
+
+def to_receipt(result: dict, text: str) -> ReceiptCreate:
+    """추출 결과에서 필요한 네 필드만 골라 검증 (LLM이 덧붙인 키는 무시)"""
+    return ReceiptCreate(**{k: result.get(k) for k in RECEIPT_FIELDS}, raw_text=text)
+
+
+def run(args) -> dict:
+    done, output_bytes = load_checkpoint(args.checkpoint, args.input)
+    texts = islice(iter_texts(args.input), done, None)
+    client = make_openai_client() if args.llm else None
+    writer = BatchWriter(args.output, args.api_url, output_bytes, args.user_id)
+
+    stats = {"rows": 0, "written": 0, "rejected": 0, "escalated": 0, "llm_failed": 0}
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool, \
+                ThreadPoolExecutor(max_workers=args.llm_concurrency) as llm_pool:
+            # 결과를 입력 순서대로 받으므로 체크포인트는 "앞에서부터 처리한 행 수" 하나로 충분함
+            batches = iter_batches(texts, args.batch_size)
+            for parsed in iter_parsed(pool, batches, window=args.workers * 2):
+                if client is not None:
+                    low = [i for i, row in enumerate(parsed) if row[3] < args.llm_threshold]
+                    futures = {i: llm_pool.submit(llm_extract, client, parsed[i][1]) for i in low}
+                    for i, fut in futures.items():
+                        stats["escalated"] += 1
+                        try:
+                            llm_result = fut.result()
+                        except Exception:
+                            llm_result = None
+                        key, text, local_result, _ = parsed[i]
+                        try:
+                            # 검증에 실패하면 로컬 추출 결과를 그대로 사용
+                            receipt = to_receipt(llm_result, text) if llm_result is not None else None
+                        except ValidationError:
+                            receipt = None
+                        if receipt is None:
+                            stats["llm_failed"] += 1
+                            continue
+                        parsed[i] = (key, text, receipt.model_dump(include=set(RECEIPT_FIELDS)), 1.0)
+
+                receipts = []
+                for key, text, result, _ in parsed:
+                    try:
+                        receipts.append(to_receipt(result, text))
+                    except ValidationError as exc:
+                        stats["rejected"] += 1
+                        print(f"skip {key}: {str(exc).splitlines()[0]}", file=sys.stderr)
+
+                if receipts:
+                    writer.write(receipts)
+                done += len(parsed)
+                save_checkpoint(args.checkpoint, args.input, done, writer.tell())
+
+                stats["rows"] += len(parsed)
+                stats["written"] += len(receipts)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{done:,} rows done | {stats['rows'] / elapsed:,.0f} rows/sec | "
+                    f"escalated {stats['escalated']:,} | rejected {stats['rejected']:,}",
+                    file=sys.stderr,
+                )
+    finally:
+        writer.close()
+
+    stats["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / stats["elapsed_sec"], 1) if stats["elapsed_sec"] else 0.0
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Bulk import raw receipt texts")
+    parser.add_argument("input", help="directory of .txt files or a JSONL file of texts")
+    parser.add_argument("--output", help="append parsed receipts to this JSONL file")
+    parser.add_argument("--api-url", help="upload each batch to <api-url>/api/receipts/import")
+    parser.add_argument("--user-id", help="X-User-Id sent with --api-url uploads (default partition if omitted)")
+    parser.add_argument(
+        "--checkpoint",
+        help="progress file used to resume after a crash (default: <output>.ckpt, or <input>.ckpt with --api-url only)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--llm", action="store_true", help="escalate low-confidence rows to OpenAI")
+    parser.add_argument("--llm-threshold", type=float, default=DEFAULT_LLM_THRESHOLD)
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.output and not args.api_url:
+        build_parser().error("one of --output or --api-url is required")
+    if args.checkpoint is None:
+        args.checkpoint = default_checkpoint(args.input, args.output)
+    stats = run(args)
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+영수증 중복 검출
+
+- 정확 중복: 정규화한 (날짜, 상호명, 금액, 품목) 지문의 해시
+- 유사 중복: raw_text 문자 shingle의 MinHash + LSH 버킷. 같은 체인의 영수증은 머리말/꼬리말이
+  같아 다른 날 구매도 유사도가 높게 나오므로, 버킷을 날짜별로 나누고 상호명이나 금액 중
+  하나가 같을 때만 중복으로 봅니다 (같은 영수증을 다시 OCR해 일부를 잘못 읽은 경우)
+
+두 조회 모두 해시 테이블 조회이고 유사 중복 후보는 같은 날짜의 영수증뿐이므로
+저장된 건수와 무관하게 끝납니다.
+
+기존 데이터 정리(backfill):
+
+    python dedup.py receipts.jsonl --output deduped.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+NEAR_THRESHOLD = 0.9
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20260224)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+
+class DuplicateReceiptError(ValueError):
+    def __init__(self, match: "DuplicateMatch"):
+        super().__init__(f"{match.kind} duplicate of receipt {match.receipt_id}")
+        self.match = match
+
+
+class DuplicateMatch:
+    def __init__(self, kind: str, receipt_id: Optional[str], similarity: float = 1.0):
+        self.kind = kind
+        self.receipt_id = receipt_id
+        self.similarity = similarity
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "receipt_id": self.receipt_id, "similarity": round(self.similarity, 3)}
+
+
+def _as_dict(receipt) -> dict:
+    return receipt.model_dump() if hasattr(receipt, "model_dump") else receipt
+
+
+def _norm(text) -> str:
+    return _NON_WORD.sub("", str(text or "").lower())
+
+
+def fingerprint(receipt) -> str:
+    r = _as_dict(receipt)
+    items = sorted(
+        (_norm(i.get("name")), int(i.get("qty") or 1), int(i.get("price") or 0))
+        for i in (_as_dict(i) for i in r.get("items") or [])
+    )
+    key = json.dumps([str(r.get("date")), _norm(r.get("store")), int(r.get("amount") or 0), items], ensure_ascii=False)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def minhash(text: Optional[str]) -> Optional[np.ndarray]:
+    text = _SPACES.sub(" ", str(text or "").lower()).strip()
+    if len(text) < SHINGLE_SIZE:
+        return None
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def _near_key(receipt: dict) -> Tuple[str, int]:
+    return _norm(receipt.get("store")), int(receipt.get("amount") or 0)
+
+
+def _bands(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    return [
+        (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+        for band in range(BANDS)
+    ]
+
+
+class DedupIndex:
+    def __init__(self, near_threshold: float = NEAR_THRESHOLD):
+        self.near_threshold = near_threshold
+        self._fingerprints: Dict[str, Optional[str]] = {}
+        # (날짜, 밴드, 밴드 해시) -> 서명 슬롯
+        self._buckets: Dict[Tuple[str, int, bytes], List[int]] = defaultdict(list)
+        self._signatures: List[np.ndarray] = []
+        self._signature_ids: List[Optional[str]] = []
+        # 슬롯별 (정규화한 상호명, 금액)
+        self._signature_keys: List[Tuple[str, int]] = []
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def clear(self):
+        self._fingerprints.clear()
+        self._buckets.clear()
+        self._signatures.clear()
+        self._signature_ids.clear()
+        self._signature_keys.clear()
+
+    def _find(self, fp: str, signature: Optional[np.ndarray], receipt: dict) -> Optional[DuplicateMatch]:
+        if fp in self._fingerprints:
+            return DuplicateMatch("exact", self._fingerprints[fp])
+        if signature is None:
+            return None
+        day = str(receipt.get("date"))
+        store, amount = _near_key(receipt)
+        best = None
+        seen = set()
+        for band in _bands(signature):
+            for slot in self._buckets.get((day, *band), ()):
+                if slot in seen:
+                    continue
+                seen.add(slot)
+                slot_store, slot_amount = self._signature_keys[slot]
+                if slot_store != store and slot_amount != amount:
+                    continue
+                similarity = float(np.mean(self._signatures[slot] == signature))
+                if similarity >= self.near_threshold and (best is None or similarity > best.similarity):
+                    best = DuplicateMatch("near", self._signature_ids[slot], similarity)
+        return best
+
+    def check(self, receipt) -> Optional[DuplicateMatch]:
+        receipt = _as_dict(receipt)
+        return self._find(fingerprint(receipt), minhash(receipt.get("raw_text")), receipt)
+
+    def _add(self, fp: str, signature: Optional[np.ndarray], receipt: dict, receipt_id: Optional[str]):
+        self._fingerprints.setdefault(fp, receipt_id)
+        if signature is not None:
+            slot = len(self._signatures)
+            self._signatures.append(signature)
+            self._signature_ids.append(receipt_id)
+            self._signature_keys.append(_near_key(receipt))
+            day = str(receipt.get("date"))
+            for band in _bands(signature):
+                self._buckets[(day, *band)].append(slot)
+
+    def check_and_add(self, receipt, receipt_id: Optional[str] = None) -> Optional[DuplicateMatch]:
+        """중복이면 매치를 반환하고, 아니면 색인에 추가한 뒤 None 반환"""
+        receipt = _as_dict(receipt)
+        fp = fingerprint(receipt)
+        signature = minhash(receipt.get("raw_text"))
+        match = self._find(fp, signature, receipt)
+        if match is None:
+            self._add(fp, signature, receipt, receipt_id)
+        return match
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicate receipts from a JSONL file")
+    parser.add_argument("input", help="JSONL file of receipts")
+    parser.add_argument("--output", required=True, help="JSONL file for the deduplicated receipts")
+    parser.add_argument("--threshold", type=float, default=NEAR_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    index = DedupIndex(args.threshold)
+    kept = dropped = 0
+    with open(args.input, encoding="utf-8-sig") as src, open(args.output, "w", encoding="utf-8") as dst:
+        for line_no, line in enumerate(src, start=1):
+            if not line.strip():
+                continue
+            receipt = json.loads(line)
+            match = index.check_and_add(receipt, receipt.get("id") or str(line_no))
+            if match is None:
+                dst.write(line if line.endswith("\n") else line + "\n")
+                kept += 1
+            else:
+                dropped += 1
+    print(json.dumps({"kept": kept, "duplicates": dropped}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
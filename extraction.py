@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime
+from typing import Optional, Tuple
+
+MODEL = "gpt-4o-mini"
+
+SYSTEM_PROMPT = "You extract receipt fields and always return JSON only."
+
+CATEGORY_MAP = {
+    "food": "식비",
+    "transport": "교통비",
+    "shopping": "쇼핑",
+    "entertainment": "엔터테인먼트",
+    "medical": "의료",
+    "education": "교육",
+    "other": "기타",
+}
+
+CATEGORY_KEYWORDS = [
+    ("food", ["coffee", "cafe", "meal", "food", "restaurant", "dining", "커피", "카페", "식당", "아메리카노"]),
+    ("transport", ["bus", "subway", "taxi", "transport", "train", "버스", "지하철", "택시"]),
+    ("shopping", ["mall", "shop", "store", "clothing", "market", "마트", "백화점"]),
+    ("entertainment", ["movie", "cinema", "game", "entertain", "영화", "게임"]),
+    ("medical", ["pharmacy", "hospital", "clinic", "medical", "약국", "병원", "의원"]),
+    ("education", ["school", "academy", "education", "course", "학원", "서점"]),
+]
+
+# 합계 라벨 바로 뒤의 금액만 인정 ("카드결제 승인번호 12345678" 같은 줄은 제외).
+# 라벨 앞뒤에 다른 글자가 붙으면("공급가액합계", "Subtotal") 합계 라벨로 보지 않음
+TOTAL_PATTERN = re.compile(
+    r"(?<![가-힣A-Za-z])(총\s*합계|합계(?:\s*금액)?|총액|결제\s*금액|받을\s*금액|청구\s*금액|total)(?![A-Za-z])"
+    r"\s*:?\s*(\d{1,3}(?:,\d{3})+|\d+)",
+    re.IGNORECASE,
+)
+# 같은 줄에서 합계 라벨 앞에 오면 부분 합계(공급가액, 부가세, 소계)로 보고 제외
+PARTIAL_TOTAL_PATTERN = re.compile(r"공급\s*가액|과세|면세|부가세|부가가치세|소계|\bsub\b|\btax\b", re.IGNORECASE)
+WON_PATTERN = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+)\s*원")
+
+
+def find_total(text: str) -> Optional[int]:
+    """부분 합계 줄을 뺀 합계 라벨 중 마지막 것의 금액 (영수증은 최종 합계가 아래쪽에 옴)"""
+    amount = None
+    for match in TOTAL_PATTERN.finditer(text):
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        if PARTIAL_TOTAL_PATTERN.search(text, line_start, match.start()):
+            continue
+        amount = int(match.group(2).replace(",", ""))
+    return amount
+
+
+def build_prompt(receipt_text: str) -> str:
+    return f"""
+    Extract the following fields from the receipt text.
+    Respond ONLY in JSON with the exact keys and no extra text.
+
+    Receipt text:
+    {receipt_text}
+
+    Fields to extract:
+    - date: YYYY-MM-DD (use today's date if missing)
+    - store: store name
+    - amount: number only (use 0 if missing)
+    - category: one of food, transport, shopping, entertainment, medical, education, other
+
+    JSON format:
+    {{
+        "date": "YYYY-MM-DD",
+        "store": "store name",
+        "amount": 0,
+        "category": "food"
+    }}
+    """
+
+
+def strip_code_fence(text: str) -> str:
+    # 코드 블록으로 감싸져 있을 수 있으므로 처리
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def map_category(category) -> str:
+    if not category:
+        return "기타"
+    key = str(category).strip().lower()
+    return CATEGORY_MAP.get(key, str(category).strip())
+
+
+def fallback_extract_scored(text) -> Tuple[dict, float]:
+    """
+    외부 호출 없이 정규식으로 영수증 필드를 추출하고 신뢰도(0~1)를 함께 반환
+    """
+    text = str(text)
+    confidence = 0.0
+
+    date_match = re.search(r"(\d{4})[-./](\d{1,2})[-./](\d{1,2})", text)
+    if date_match:
+        yyyy, mm, dd = date_match.groups()
+        date = f"{yyyy}-{int(mm):02d}-{int(dd):02d}"
+        confidence += 0.3
+    else:
+        date = datetime.now().strftime('%Y-%m-%d')
+
+    # 날짜 숫자(연도 등)가 금액으로 잡히지 않도록 제외하고, 합계 줄이 있으면 우선 사용
+    body = text[:date_match.start()] + text[date_match.end():] if date_match else text
+    amount = find_total(body)
+    if amount is not None:
+        confidence += 0.4
+    else:
+        # "원"이 붙은 숫자가 있으면 그중에서만 고름 (승인번호/카드번호 제외)
+        numbers = WON_PATTERN.findall(body) or re.findall(r"\d{1,3}(?:,\d{3})+|\d+", body)
+        amounts = [int(n.replace(",", "")) for n in numbers] if numbers else [0]
+        amount = max(amounts) if amounts else 0
+        if amount > 0:
+            confidence += 0.2
+
+    first_line = text.strip().splitlines()[0] if text.strip() else "Unknown"
+    store = first_line.strip() if first_line else "Unknown"
+    if store and not re.fullmatch(r"[\d\s,.:/-]+", store):
+        confidence += 0.1
+
+    category = "other"
+    lower = text.lower()
+    for name, keywords in CATEGORY_KEYWORDS:
+        if any(k in lower for k in keywords):
+            category = name
+            confidence += 0.2
+            break
+
+    result = {
+        "date": date,
+        "store": store or "Unknown",
+        "amount": amount,
+        "category": CATEGORY_MAP[category],
+    }
+    return result, round(min(confidence, 1.0), 2)
+
+
+def fallback_extract(text) -> dict:
+    return fallback_extract_scored(text)[0]
+
+
+def llm_extract(client, receipt_text, model: str = MODEL) -> Optional[dict]:
+    """
+    UI 없이 OpenAI로 영수증 필드를 추출 (실패 시 예외 전달, JSON 파싱 실패 시 None)
+    """
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(str(receipt_text))}
+        ],
+        temperature=0.3,
+        max_tokens=500,
+        response_format={"type": "json_object"}
+    )
+    try:
+        result = json.loads(strip_code_fence(response.choices[0].message.content))
+    except json.JSONDecodeError:
+        return None
+
+    if not result.get('date'):
+        result['date'] = datetime.now().strftime('%Y-%m-%d')
+    if not result.get('store'):
+        result['store'] = "미상"
+    result['category'] = map_category(result.get('category'))
+    try:
+        result['amount'] = int(result.get('amount') or 0)
+    except (ValueError, TypeError):
+        result['amount'] = 0
+    return result
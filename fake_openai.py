@@ -0,0 +1,194 @@
+"""
+부하 테스트용 로컬 가짜 OpenAI chat-completions 서버
+
+실제 API 없이 응답 지연, 5xx 오류, 429(rate limit)를 원하는 비율로 흉내 냅니다.
+응답 본문은 프롬프트 속 영수증 텍스트를 로컬 추출기로 파싱한 JSON입니다.
+
+    python fake_openai.py --port 8001 --latency-ms 400 --jitter-ms 200 --error-rate 0.02 --rate-limit-rate 0.05
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8001/v1 uvicorn api_app:app
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from extraction import CATEGORY_MAP, fallback_extract
+
+_RECEIPT_MARKER = "Receipt text:"
+_FIELDS_MARKER = "Fields to extract:"
+_ENGLISH_CATEGORY = {v: k for k, v in CATEGORY_MAP.items()}
+
+
+def _receipt_text(messages) -> str:
+    prompt = next((m.get("content") or "" for m in reversed(messages or []) if m.get("role") == "user"), "")
+    start = prompt.find(_RECEIPT_MARKER)
+    end = prompt.find(_FIELDS_MARKER)
+    if start < 0:
+        return prompt
+    return prompt[start + len(_RECEIPT_MARKER):end if end > start else None].strip()
+
+
+class FakeOpenAIServer:
+    """
+    스레드에서 도는 가짜 서버. with 문으로 쓰면 빈 포트에서 시작하고 끝나면 종료합니다.
+
+    latency_ms ± jitter_ms 만큼 잠든 뒤 error_rate 비율로 500, rate_limit_rate 비율로
+    429(retry-after-ms 포함)를 돌려주고, 나머지는 정상 completion을 반환합니다.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_ms: int = 100,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_ms = retry_after_ms
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+                status, payload, headers = server.respond(json.loads(body or b"{}"))
+                self._send(status, payload, headers)
+
+        return Handler
+
+    def _roll(self):
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif roll < self.rate_limit_rate + self.error_rate:
+                outcome = "errors"
+            else:
+                outcome = "ok"
+            self.counts["requests"] += 1
+            self.counts[outcome] += 1
+        return delay, outcome
+
+    def respond(self, request: dict):
+        delay, outcome = self._roll()
+        if delay:
+            time.sleep(delay)
+        if outcome == "rate_limited":
+            return 429, {"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}}, {
+                "retry-after-ms": str(self.retry_after_ms),
+            }
+        if outcome == "errors":
+            return 500, {"error": {"message": "Internal server error (fake)", "type": "server_error"}}, None
+
+        fields = fallback_extract(_receipt_text(request.get("messages")))
+        fields["category"] = _ENGLISH_CATEGORY.get(fields["category"], "other")
+        return 200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(fields, ensure_ascii=False)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }, None
+
+    def serve_forever(self):
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat-completions API for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="mean response delay")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="uniform +/- spread around the mean delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after-ms", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = FakeOpenAIServer(
+        args.host, args.port, args.latency_ms, args.jitter_ms,
+        args.error_rate, args.rate_limit_rate, args.retry_after_ms, args.seed,
+    )
+    print(f"fake OpenAI API on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.counts))
+
+
+if __name__ == "__main__":
+    main()
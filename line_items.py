@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from schemas import Receipt
+
+INITIAL_CAPACITY = 1024
+
+
+def _code_dtype(size: int):
+    # pandas Categorical이 카테고리 수에 맞춰 쓰는 코드 정수 폭과 같게 맞춰야 from_codes가 복사하지 않음
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class _Column:
+    """
+    append 전용 정수 열
+
+    새 값은 array 버퍼에 빠르게 쌓아 두었다가 view()를 부를 때 그 부분만 numpy 버퍼(용량을
+    두 배씩 늘림)로 옮깁니다. 앞쪽 n개는 이후 바뀌지 않으므로 view()는 복사 없이 읽기 전용
+    뷰를 넘깁니다. 용량을 늘릴 때는 새 버퍼로 옮기므로 이미 넘긴 뷰는 그대로 유효합니다.
+    """
+
+    __slots__ = ("_data", "_n", "_pending", "append")
+
+    def __init__(self, dtype=np.int64):
+        self._data = np.empty(INITIAL_CAPACITY, dtype=dtype)
+        self._n = 0
+        self._pending = array("q")
+        # 저장 경로에서 메서드 호출 한 단계를 줄이기 위해 버퍼의 append를 그대로 노출
+        self.append = self._pending.append
+
+    def __len__(self):
+        return self._n + len(self._pending)
+
+    def fit(self, dtype):
+        """코드 폭이 커졌으면 버퍼를 바꿈 (카테고리 수가 127, 32767을 넘을 때 한 번씩)"""
+        if self._data.dtype != dtype:
+            self._data = self._data.astype(dtype)
+
+    def view(self) -> np.ndarray:
+        if self._pending:
+            end = len(self)
+            if end > len(self._data):
+                grown = np.empty(max(end, len(self._data) * 2), dtype=self._data.dtype)
+                grown[:self._n] = self._data[:self._n]
+                self._data = grown
+            self._data[self._n:end] = np.frombuffer(self._pending, dtype=np.int64)
+            self._n = end
+            del self._pending[:]
+        view = self._data[:self._n]
+        view.flags.writeable = False
+        return view
+
+
+class _Codes:
+    """문자열 -> 정수 코드 사전 (pandas Categorical로 바로 넘기기 위함)"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._dtype: Optional[pd.CategoricalDtype] = None
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+            self._dtype = None
+        return code
+
+    def dtype(self) -> pd.CategoricalDtype:
+        # 새 값이 들어왔을 때만 다시 만듦
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(pd.Index(self.values, dtype=object))
+        return self._dtype
+
+
+class LineItemTable:
+    """
+    저장 시점에 펼쳐 두는 품목 단위 열 지향 테이블
+
+    문자열(날짜, 품목명)은 사전 코드로, 숫자는 정수 열로 보관해 행당 수십 바이트로 유지합니다.
+    열은 append 전용이라 to_frame()은 지난 호출 이후 추가된 행만 numpy 버퍼로 옮기고,
+    지금까지 쌓인 부분의 읽기 전용 뷰로 DataFrame을 만듭니다(전체 열 복사 없음, 코드 범위
+    확인만 한 번 훑음). 받은 프레임을 제자리에서 고치면 pandas 버전과 무관하게 오류가 나므로
+    저장된 데이터는 바뀌지 않습니다. 날짜 범위를 주면 해당 행만 골라 냅니다. price는 단가입니다.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self._qty)
+
+    def clear(self):
+        self._dates = _Codes()
+        self._names = _Codes()
+        self._receipt = _Column()
+        self._date = _Column(_code_dtype(0))
+        self._name = _Column(_code_dtype(0))
+        self._qty = _Column()
+        self._price = _Column()
+        self._receipt_count = 0
+
+    def add(self, receipt: Receipt):
+        if not receipt.items:
+            return
+        receipt_no = self._receipt_count
+        self._receipt_count += 1
+        date_code = self._dates.code(receipt.date)
+        for item in receipt.items:
+            self._receipt.append(receipt_no)
+            self._date.append(date_code)
+            self._name.append(self._names.code(item.name.strip()))
+            self._qty.append(item.qty)
+            self._price.append(item.price)
+
+    def to_frame(self, from_date: Optional[str] = None, to_date: Optional[str] = None) -> pd.DataFrame:
+        self._date.fit(_code_dtype(len(self._dates.values)))
+        self._name.fit(_code_dtype(len(self._names.values)))
+        frame = pd.DataFrame({
+            "receipt": self._receipt.view(),
+            "date": pd.Categorical.from_codes(self._date.view(), dtype=self._dates.dtype()),
+            "name": pd.Categorical.from_codes(self._name.view(), dtype=self._names.dtype()),
+            "qty": self._qty.view(),
+            "price": self._price.view(),
+        }, copy=False)
+        if from_date or to_date:
+            keep = [
+                code for code, day in enumerate(self._dates.values)
+                if (not from_date or day >= from_date) and (not to_date or day <= to_date)
+            ]
+            frame = frame[np.isin(self._date.view(), keep)].reset_index(drop=True)
+        return frame
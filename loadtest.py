@@ -0,0 +1,396 @@
+"""
+api_app 부하 테스트 (외부 네트워크 없이 실행)
+
+가짜 OpenAI 서버(fake_openai.py)를 띄우고 api_app을 uvicorn 하위 프로세스로 실행한 뒤,
+지정한 동시성으로 추출/저장/검색/통계 요청을 섞어 보내고 다음을 보고합니다.
+
+- 처리량(req/s)과 작업별 지연 시간 p50/p95/p99/max
+- 추출 요청 중 로컬 추출로 대체된 비율(fallback rate)
+- 서버 프로세스 RSS 메모리 증가량
+
+    python loadtest.py --concurrency 32 --duration 30 --users 50 \\
+        --latency-ms 400 --jitter-ms 200 --error-rate 0.02 --rate-limit-rate 0.05 \\
+        --mix extract=4,search=2,stats=2,items=1 --report loadtest.json
+
+--api-url로 이미 떠 있는 서버를 대상으로 할 수도 있습니다(메모리는 --server-pid를 주면 측정).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from fake_openai import FakeOpenAIServer
+
+DEFAULT_MIX = "extract=4,search=2,stats=2,items=1,list=1"
+
+STORES = [
+    ("메가커피 카페", ["아메리카노", "카페라떼", "바닐라라떼"], 2000, 5500),
+    ("김밥천국 식당", ["참치김밥", "라면", "떡볶이"], 3000, 9000),
+    ("이마트 마트", ["우유", "계란", "두부", "사과"], 1500, 12000),
+    ("CGV 영화", ["일반 관람권", "팝콘 세트"], 6000, 15000),
+    ("온누리 약국", ["감기약", "소화제", "밴드"], 2000, 8000),
+    ("영풍문고 서점", ["노트", "볼펜", "문제집"], 1000, 22000),
+    ("카카오 택시", ["운행요금"], 4800, 30000),
+]
+
+
+def make_receipt_text(rng: random.Random):
+    """합성 영수증 원문과 그 품목 목록"""
+    store, names, low, high = rng.choice(STORES)
+    day = f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    items = [
+        {"name": name, "qty": rng.randint(1, 3), "price": rng.randrange(low, high, 100)}
+        for name in rng.sample(names, rng.randint(1, len(names)))
+    ]
+    total = sum(i["qty"] * i["price"] for i in items)
+    lines = [store, f"{day} {rng.randint(8, 22):02d}:{rng.randint(0, 59):02d}"]
+    lines += [f"{i['name']} x{i['qty']} {i['qty'] * i['price']:,}원" for i in items]
+    lines += [f"합계: {total:,}원", f"승인번호 {rng.randint(10_000_000, 99_999_999)}"]
+    return "\n".join(lines), items
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.status_codes: Counter = Counter()
+        self.extractors: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, op: str, elapsed: float, status, ok: bool):
+        with self._lock:
+            self.latencies[op].append(elapsed)
+            self.status_codes[str(status)] += 1
+            if not ok:
+                self.errors[op] += 1
+
+    def extractor(self, name: str):
+        with self._lock:
+            self.extractors[name] += 1
+
+
+def _call(recorder: Recorder, op: str, send: Callable):
+    start = time.perf_counter()
+    try:
+        resp = send()
+    except Exception as exc:
+        recorder.record(op, time.perf_counter() - start, type(exc).__name__, False)
+        return None
+    recorder.record(op, time.perf_counter() - start, resp.status_code, resp.status_code < 400)
+    return resp if resp.status_code < 400 else None
+
+
+def op_extract(client, rng, headers, recorder):
+    """앱의 실제 흐름: 원문 추출 후 저장"""
+    text, items = make_receipt_text(rng)
+    resp = _call(recorder, "extract", lambda: client.post("/api/receipts/extract", json={"text": text}, headers=headers))
+    if resp is None:
+        return
+    fields = resp.json()
+    recorder.extractor(fields.pop("extractor"))
+    fields.pop("error", None)
+    payload = {**fields, "items": items, "raw_text": text, "source": "api"}
+    _call(recorder, "create", lambda: client.post(
+        "/api/receipts", json=payload, params={"on_duplicate": "flag"}, headers=headers,
+    ))
+
+
+def op_search(client, rng, headers, recorder):
+    store, names, _, _ = rng.choice(STORES)
+    q = rng.choice([store.split()[0], rng.choice(names)])
+    _call(recorder, "search", lambda: client.get("/api/receipts", params={"q": q, "limit": 20}, headers=headers))
+
+
+def op_stats(client, rng, headers, recorder):
+    _call(recorder, "stats", lambda: client.get("/api/receipts/stats", params={"max_points": 366}, headers=headers))
+
+
+def op_items(client, rng, headers, recorder):
+    _call(recorder, "items", lambda: client.get("/api/receipts/items/stats", params={"top_n": 10}, headers=headers))
+
+
+def op_list(client, rng, headers, recorder):
+    _call(recorder, "list", lambda: client.get(
+        "/api/receipts", params={"limit": 50, "order": "desc"}, headers=headers,
+    ))
+
+
+SCENARIOS = {
+    "extract": op_extract,
+    "search": op_search,
+    "stats": op_stats,
+    "items": op_items,
+    "list": op_list,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("mix needs at least one scenario with a positive weight")
+    return mix
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """프로세스 RSS (Linux /proc, 없으면 psutil, 둘 다 안 되면 None)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except psutil.Error:
+        return None
+
+
+def _ms(values: np.ndarray, q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2)
+
+
+def summarize(recorder: Recorder, elapsed: float, rss: List[int]) -> dict:
+    operations = {}
+    total = 0
+    for op, values in sorted(recorder.latencies.items()):
+        arr = np.asarray(values)
+        total += len(arr)
+        operations[op] = {
+            "count": len(arr),
+            "errors": recorder.errors[op],
+            "rps": round(len(arr) / elapsed, 2),
+            "p50_ms": _ms(arr, 50),
+            "p95_ms": _ms(arr, 95),
+            "p99_ms": _ms(arr, 99),
+            "max_ms": round(float(arr.max()) * 1000, 2),
+        }
+    extracted = sum(recorder.extractors.values())
+    memory = None
+    if rss:
+        stored = operations.get("create", {}).get("count", 0) - recorder.errors["create"]
+        growth = rss[-1] - rss[0]
+        memory = {
+            "rss_start_mb": round(rss[0] / 2**20, 1),
+            "rss_end_mb": round(rss[-1] / 2**20, 1),
+            "rss_peak_mb": round(max(rss) / 2**20, 1),
+            "growth_mb": round(growth / 2**20, 1),
+            "growth_per_receipt_kb": round(growth / 1024 / stored, 2) if stored else None,
+        }
+    return {
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "operations": operations,
+        "status_codes": dict(recorder.status_codes),
+        "extract": dict(recorder.extractors),
+        "fallback_rate": round(recorder.extractors["fallback"] / extracted, 4) if extracted else None,
+        "memory": memory,
+    }
+
+
+def run_load(
+    client,
+    mix: Dict[str, float],
+    concurrency: int = 8,
+    duration: Optional[float] = None,
+    iterations: Optional[int] = None,
+    users: int = 1,
+    seed: int = 0,
+    memory_pid: Optional[int] = None,
+    sample_interval: float = 0.5,
+) -> dict:
+    """
+    concurrency개의 작업자가 mix 비율로 시나리오를 골라 duration초 또는 iterations회까지 반복
+
+    client는 base_url이 잡힌 httpx.Client(또는 같은 인터페이스의 TestClient)입니다.
+    memory_pid를 주면 그 프로세스의 RSS를 sample_interval마다 기록합니다.
+    """
+    if duration is None and iterations is None:
+        raise ValueError("set duration or iterations")
+    names, weights = list(mix), list(mix.values())
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration if duration else None
+    budget = iter(range(iterations)) if iterations is not None else None
+    budget_lock = threading.Lock()
+    stop = threading.Event()
+    rss: List[int] = []
+
+    def sample_memory():
+        while memory_pid is not None:
+            value = rss_bytes(memory_pid)
+            if value is not None:
+                rss.append(value)
+            if stop.wait(sample_interval):
+                return
+
+    def worker(worker_no: int):
+        rng = random.Random(seed * 100_003 + worker_no)
+        while deadline is None or time.perf_counter() < deadline:
+            if budget is not None:
+                with budget_lock:
+                    if next(budget, None) is None:
+                        return
+            headers = {"X-User-Id": f"loadtest-{rng.randrange(users)}"}
+            SCENARIOS[rng.choices(names, weights)[0]](client, rng, headers, recorder)
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    final = rss_bytes(memory_pid) if memory_pid is not None else None
+    if final is not None:
+        rss.append(final)
+    return summarize(recorder, elapsed, rss)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api_server(openai_url: str, max_retries: int, timeout: float = 30.0):
+    """가짜 OpenAI를 바라보는 api_app을 uvicorn 하위 프로세스로 시작하고 (process, url) 반환"""
+    import httpx
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "fake-key",
+        "OPENAI_BASE_URL": openai_url,
+        "OPENAI_MAX_RETRIES": str(max_retries),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api_app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"api server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/openapi.json", timeout=1.0).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("api server did not start in time")
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['requests']} requests in {report['duration_s']}s "
+        f"({report['throughput_rps']} req/s, {report['errors']} errors)",
+        f"{'operation':<10}{'count':>8}{'errors':>8}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+    ]
+    for op, s in report["operations"].items():
+        lines.append(
+            f"{op:<10}{s['count']:>8}{s['errors']:>8}{s['rps']:>9}"
+            f"{s['p50_ms']:>8}ms{s['p95_ms']:>8}ms{s['p99_ms']:>8}ms{s['max_ms']:>8}ms"
+        )
+    if report["fallback_rate"] is not None:
+        lines.append(f"fallback rate: {report['fallback_rate']:.2%} {report['extract']}")
+    if report["memory"]:
+        m = report["memory"]
+        lines.append(
+            f"server RSS: {m['rss_start_mb']} -> {m['rss_end_mb']} MB "
+            f"(peak {m['rss_peak_mb']}, +{m['growth_mb']} MB, {m['growth_per_receipt_kb']} KB/receipt)"
+        )
+    if report.get("fake_openai"):
+        lines.append(f"fake OpenAI: {report['fake_openai']}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load-test api_app against a local fake OpenAI server")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run (default 10 unless --iterations)")
+    parser.add_argument("--iterations", type=int, default=None, help="total scenario runs instead of a duration")
+    parser.add_argument("--users", type=int, default=10, help="spread requests across this many X-User-Id tenants")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. extract=4,search=2,stats=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="fake OpenAI mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake OpenAI 500 rate")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fake OpenAI 429 rate")
+    parser.add_argument("--max-retries", type=int, default=2, help="OpenAI client retries inside api_app")
+    parser.add_argument("--api-url", default=None, help="use a running api_app instead of starting one")
+    parser.add_argument("--server-pid", type=int, default=None, help="pid of --api-url server for memory sampling")
+    parser.add_argument("--report", default=None, help="write the JSON report to this path")
+    return parser
+
+
+def main(argv=None):
+    import httpx
+
+    args = build_parser().parse_args(argv)
+    mix = parse_mix(args.mix)
+    duration = args.duration if args.duration is not None or args.iterations is not None else 10.0
+
+    fake = FakeOpenAIServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+    ).start()
+    proc = None
+    try:
+        if args.api_url:
+            url, server_pid = args.api_url.rstrip("/"), args.server_pid
+            print(f"fake OpenAI API on {fake.url} (point the server's OPENAI_BASE_URL here)", file=sys.stderr)
+        else:
+            proc, url = start_api_server(fake.url, args.max_retries)
+            server_pid = proc.pid
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        with httpx.Client(base_url=url, limits=limits, timeout=httpx.Timeout(60.0, connect=5.0)) as client:
+            report = run_load(
+                client, mix, args.concurrency, duration, args.iterations, args.users, args.seed,
+                memory_pid=server_pid,
+            )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        fake.stop()
+
+    report["fake_openai"] = dict(fake.counts)
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("report", "server_pid")}
+    print(format_report(report))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import IO, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError
+
+from schemas import ReceiptCreate
+
+EXPORT_COLUMNS = ["id", "date", "store", "amount", "category", "items", "raw_text", "source", "user_id", "created_at", "duplicate_of"]
+DEFAULT_BATCH_SIZE = 10_000
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename: Optional[str], default: str = "csv") -> str:
+    if not filename:
+        return default
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if ext in ("parquet", "pq"):
+        return "parquet"
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    return default
+
+
+def _to_record(row) -> dict:
+    # Receipt 모델과 Streamlit 세션에 보관하는 dict를 모두 받음
+    if hasattr(row, "model_dump"):
+        row = row.model_dump(mode="json")
+    record = {col: row.get(col) for col in EXPORT_COLUMNS}
+    items = record["items"]
+    if items:
+        record["items"] = json.dumps(
+            [i.model_dump() if hasattr(i, "model_dump") else i for i in items],
+            ensure_ascii=False,
+        )
+    return record
+
+
+def iter_csv(batches: Iterable[list], bom: bool = True) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    if bom:
+        # 엑셀에서 한글이 깨지지 않도록 utf-8-sig (기존 다운로드와 동일)
+        buf.write("\ufeff")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(_to_record(r) for r in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+class _DrainSink(io.RawIOBase):
+    # 쓰기 전용 파일 객체. row group마다 쌓인 내용을 꺼내 넘기고 비움
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("date", pa.string()),
+        ("store", pa.string()),
+        ("amount", pa.int64()),
+        ("category", pa.string()),
+        ("items", pa.string()),
+        ("raw_text", pa.string()),
+        ("source", pa.string()),
+        ("user_id", pa.string()),
+        ("created_at", pa.string()),
+        ("duplicate_of", pa.string()),
+    ])
+
+
+def iter_parquet(batches: Iterable[list]) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+
+    schema = _parquet_schema()
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            records = [_to_record(r) for r in batch]
+            if not records:
+                continue
+            writer.write_table(pa.Table.from_pylist(records, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def iter_export(batches: Iterable[list], fmt: str = "csv") -> Iterator[bytes]:
+    if fmt == "parquet":
+        return iter_parquet(batches)
+    if fmt == "csv":
+        return iter_csv(batches)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def _clean_record(record: dict) -> dict:
+    record = {k: v for k, v in record.items() if k in ReceiptCreate.model_fields}
+    for key, value in list(record.items()):
+        if value == "" or value is None:
+            record.pop(key)
+    items = record.get("items")
+    if isinstance(items, str):
+        record["items"] = json.loads(items)
+    return record
+
+
+def _iter_csv_records(fileobj: IO[bytes]) -> Iterator[dict]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def _iter_jsonl_records(fileobj: IO[bytes]) -> Iterator[bytes]:
+    # 줄 단위 파싱은 iter_import_batches의 행별 처리에서 (잘못된 줄 하나로 전체가 멈추지 않도록)
+    for line in fileobj:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _parse_record(record) -> dict:
+    if isinstance(record, (bytes, str)):
+        record = json.loads(record)
+        if not isinstance(record, dict):
+            raise ValueError("JSONL line is not an object")
+    return record
+
+
+def _iter_parquet_records(fileobj: IO[bytes], batch_size: int) -> Iterator[dict]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet import requires pyarrow (pip install pyarrow)") from exc
+    for record_batch in pq.ParquetFile(fileobj).iter_batches(batch_size=batch_size):
+        yield from record_batch.to_pylist()
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors: List[str] = []
+
+    def reject(self, row_no: int, message: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"row {row_no}: {message}")
+
+
+def iter_import_batches(
+    fileobj: IO[bytes],
+    fmt: str = "csv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    report: Optional[ImportReport] = None,
+) -> Iterator[List[ReceiptCreate]]:
+    """
+    업로드된 파일을 검증된 ReceiptCreate 배치로 변환
+
+    파싱이나 검증에 실패한 행은 건너뛰고 report에 기록합니다. 저장소가 중복 등으로
+    거부할 수 있으므로 imported는 호출하는 쪽에서 셉니다.
+    """
+    if fmt == "csv":
+        records = _iter_csv_records(fileobj)
+    elif fmt == "jsonl":
+        records = _iter_jsonl_records(fileobj)
+    elif fmt == "parquet":
+        records = _iter_parquet_records(fileobj, batch_size)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    batch: List[ReceiptCreate] = []
+    for row_no, record in enumerate(records, start=1):
+        try:
+            batch.append(ReceiptCreate(**_clean_record(_parse_record(record))))
+        except (ValidationError, ValueError, TypeError) as exc:
+            if report is not None:
+                report.reject(row_no, str(exc).splitlines()[0])
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, date
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from pydantic import BaseModel, Field
 
 Category = Literal[
@@ -29,6 +29,7 @@ class ReceiptBase(BaseModel):
     items: Optional[List[ReceiptItem]] = None
     raw_text: Optional[str] = None
     source: Optional[Literal["manual", "ocr", "api"]] = "manual"
+    user_id: Optional[str] = Field(None, description="Owner; the API stores receipts under the X-User-Id tenant")
 
 
 class ReceiptCreate(ReceiptBase):
@@ -38,6 +39,7 @@ class ReceiptCreate(ReceiptBase):
 class Receipt(ReceiptBase):
     id: str = Field(..., description="UUID")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    duplicate_of: Optional[str] = Field(None, description="Id of the receipt this one duplicates (flagged only)")
 
 
 class ReceiptStats(BaseModel):
@@ -46,3 +48,56 @@ class ReceiptStats(BaseModel):
     top_category: Optional[str] = None
     daily_series: List[dict]
     category_series: List[dict]
+    monthly_series: List[dict] = []
+    granularity: str = "day"
+
+
+class ImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[str] = []
+
+
+class DedupResult(BaseModel):
+    mode: Literal["reject", "flag"]
+    duplicates: int
+    remaining: int
+
+
+class ItemStats(BaseModel):
+    line_items: int
+    top_items: List[dict]
+    unit_price_series: List[dict]
+    basket_size: List[dict]
+
+
+class ExtractRequest(BaseModel):
+    text: str = Field(..., min_length=1, description="Raw receipt text")
+
+
+class ExtractResult(BaseModel):
+    date: str
+    store: str
+    amount: int
+    category: Category
+    extractor: Literal["llm", "fallback"] = Field(..., description="Which extractor produced the fields")
+    error: Optional[str] = Field(None, description="Why the LLM call fell back to local extraction")
+
+
+class Alert(BaseModel):
+    kind: Literal["outlier", "budget"]
+    message: str
+    receipt_id: Optional[str] = None
+    date: str
+    category: Optional[str] = Field(None, description="None for the overall monthly budget")
+    amount: int = Field(..., description="Receipt amount (outlier) or month-to-date spend (budget)")
+    zscore: Optional[float] = None
+    mean: Optional[float] = None
+    budget: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class BudgetStatus(BaseModel):
+    month: str = Field(..., description="YYYY-MM")
+    budgets: Dict[str, int] = Field(..., description="Monthly budget per category; 'total' caps all spend")
+    spent: Dict[str, int]
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from schemas import Receipt
+
+# 상호명 > 품목명 > 원문 순으로 가중치
+FIELD_WEIGHTS = {"store": 3.0, "items": 2.0, "raw_text": 1.0}
+
+# 한글 연속 구간과 그 밖의 영숫자 연속 구간을 따로 자름 ("GS25편의점" -> "gs25", "편의점")
+_RUN = re.compile(r"[가-힣ㄱ-ㆎ]+|[^\W가-힣ㄱ-ㆎ_]+", re.UNICODE)
+_HANGUL = re.compile(r"[가-힣ㄱ-ㆎ]")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    검색어/문서를 색인 단위로 분리
+
+    한글은 띄어쓰기가 불규칙하므로 문자 bigram으로 쪼개고(한 글자는 그대로),
+    그 밖의 단어는 소문자 단어 단위로 사용합니다.
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in _RUN.findall(text.lower()):
+        if _HANGUL.search(word):
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class _Posting:
+    """토큰 하나의 (doc_id, 가중치) 목록. doc_id는 증가 순으로만 추가되므로 항상 정렬돼 있음"""
+
+    __slots__ = ("ids", "weights")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.weights = array("d")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # 복사본을 넘겨야 이후 append 때 array 버퍼 크기를 바꿀 수 있음 (memcpy라 빠름)
+        return (
+            np.frombuffer(self.ids, dtype=np.int64).copy(),
+            np.frombuffer(self.weights, dtype=np.float64).copy(),
+        )
+
+
+class SearchIndex:
+    """
+    상호명, 품목명, 원문에 대한 역색인 (doc_id는 저장소의 행 번호)
+
+    posting을 정렬된 정수/실수 배열로 보관해 교집합과 점수 계산, 상위 limit 선택을
+    numpy로 한 번에 처리합니다. 호출하는 쪽(ReceiptStore)이 add와 search를 같은 잠금으로 묶습니다.
+
+    문서의 한글은 bigram으로만 색인하므로, 한 글자 검색어("빵")는 그 글자가 들어간
+    bigram들("식빵", "빵집" 등)의 posting을 합쳐서 찾습니다.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, _Posting] = {}
+        # 한글 한 글자 -> 그 글자가 들어간 bigram 토큰
+        self._bigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        self._postings.clear()
+        self._bigrams.clear()
+        self._size = 0
+
+    def _fields(self, receipt: Receipt) -> Iterable[Tuple[str, Optional[str]]]:
+        yield "store", receipt.store
+        if receipt.items:
+            yield "items", " ".join(item.name for item in receipt.items)
+        yield "raw_text", receipt.raw_text
+
+    def add(self, doc_id: int, receipt: Receipt):
+        weights: Dict[str, float] = defaultdict(float)
+        for field, text in self._fields(receipt):
+            for token in tokenize(text):
+                weights[token] += FIELD_WEIGHTS[field]
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = _Posting()
+                if len(token) == 2 and _HANGUL.match(token):
+                    for char in token:
+                        self._bigrams[char].add(token)
+            posting.ids.append(doc_id)
+            posting.weights.append(weight)
+        self._size += 1
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """검색어 토큰 하나의 (정렬된 doc_id, 가중치). 없으면 None"""
+        if len(term) == 1 and _HANGUL.match(term):
+            postings = [self._postings[t] for t in (term, *self._bigrams.get(term, ())) if t in self._postings]
+            if len(postings) > 1:
+                # 여러 bigram에 걸린 문서는 가장 큰 가중치 하나만 남김
+                ids = np.concatenate([p.arrays()[0] for p in postings])
+                weights = np.concatenate([p.arrays()[1] for p in postings])
+                order = np.lexsort((-weights, ids))
+                ids, weights = ids[order], weights[order]
+                first = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]]))
+                return ids[first], weights[first]
+        else:
+            postings = [self._postings[term]] if term in self._postings else []
+        return postings[0].arrays() if postings else None
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """모든 검색어 토큰을 포함하는 문서를 점수 내림차순(동점이면 doc_id 순)으로 반환"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        postings = []
+        for term in terms:
+            arrays = self._term_arrays(term)
+            if arrays is None or not len(arrays[0]):
+                return []
+            postings.append(arrays)
+        # 가장 짧은 posting에서 시작해 나머지에서 이진 탐색으로 교집합
+        postings.sort(key=lambda p: len(p[0]))
+        idf = [math.log(1 + self._size / len(p[0])) for p in postings]
+        ids, weights = postings[0]
+        scores = weights * idf[0]
+        for (other, weights), term_idf in zip(postings[1:], idf[1:]):
+            if len(other) * 8 >= self._size:
+                # 흔한 토큰: 이진 탐색 대신 doc_id 크기의 배열로 바로 조회
+                dense = np.full(int(other[-1]) + 1, np.nan)
+                dense[other] = weights
+                term_weights = dense[np.minimum(ids, len(dense) - 1)]
+                term_weights[ids >= len(dense)] = np.nan
+                hit = ~np.isnan(term_weights)
+                term_weights = term_weights[hit]
+            else:
+                pos = np.minimum(np.searchsorted(other, ids), len(other) - 1)
+                hit = other[pos] == ids
+                term_weights = weights[pos[hit]]
+            ids, scores = ids[hit], scores[hit]
+            if not len(ids):
+                return []
+            scores += term_weights * term_idf
+
+        if limit is not None and len(ids) > limit:
+            # 전체 정렬 없이 상위 limit개만 추림. ids는 오름차순이라 경계 점수의 동점은 앞에서부터 채움
+            cutoff = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            above = np.flatnonzero(scores > cutoff)
+            ties = np.flatnonzero(scores == cutoff)[:limit - len(above)]
+            keep = np.concatenate([above, ties])
+            ids, scores = ids[keep], scores[keep]
+        order = np.lexsort((ids, -scores))
+        return list(zip(ids[order].tolist(), scores[order].tolist()))
@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from aggregates import Aggregates
+from alerts import AlertEngine
+from analytics import downsample_series
+from dedup import DedupIndex, DuplicateReceiptError
+from line_items import LineItemTable
+from schemas import Alert, Receipt, ReceiptCreate
+from search import SearchIndex
+
+# reject: 중복이면 DuplicateReceiptError, flag: duplicate_of를 채워 저장, allow: 검사 안 함
+DUPLICATE_MODES = ("reject", "flag", "allow")
+
+DEFAULT_USER = "default"
+DEFAULT_MAX_PARTITIONS = 1000
+
+
+class PartitionEvictedError(RuntimeError):
+    """TenantStore가 이미 내려놓은 파티션에 쓰려고 할 때 (쓰기가 사라지지 않도록 거부)"""
+
+
+class ReceiptStore:
+    """
+    한 사용자의 영수증과 색인/집계
+
+    색인과 집계는 스레드 안전하지 않으므로 쓰기와 조회를 모두 self._lock 안에서 처리합니다.
+    FastAPI는 동기 엔드포인트를 스레드 풀에서 실행하므로 밖에서 색인을 직접 만지지 말고
+    이 클래스의 메서드를 사용하세요.
+    """
+
+    def __init__(
+        self,
+        on_duplicate: str = "reject",
+        user_id: Optional[str] = None,
+        budgets: Optional[Dict[str, int]] = None,
+    ):
+        self.on_duplicate = on_duplicate
+        self.user_id = user_id
+        self._rows: List[Receipt] = []
+        self.index = SearchIndex()
+        self.dedup = DedupIndex()
+        self.aggregates = Aggregates()
+        self.line_items = LineItemTable()
+        self.alerts = AlertEngine(budgets)
+        # 색인/중복 검사/집계 갱신과 조회를 묶는 파티션 잠금
+        self._lock = threading.RLock()
+        self.closed = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self.index.clear()
+            self.dedup.clear()
+            self.aggregates.clear()
+            self.line_items.clear()
+            self.alerts.clear()
+
+    def _check_open(self):
+        if self.closed:
+            raise PartitionEvictedError(f"partition for {self.user_id!r} was evicted; get it again from TenantStore")
+
+    def close(self) -> List[Receipt]:
+        """이후 쓰기를 막고 현재 행 목록을 반환 (TenantStore가 내려놓기 직전에 호출)"""
+        with self._lock:
+            self.closed = True
+            return list(self._rows)
+
+    def _append(self, receipt: Receipt):
+        with self._lock:
+            doc_id = len(self._rows)
+            self._rows.append(receipt)
+            self.index.add(doc_id, receipt)
+            if receipt.duplicate_of is None:
+                self.aggregates.add(receipt)
+                self.line_items.add(receipt)
+                self.alerts.observe(receipt)
+
+    def add(self, payload: ReceiptCreate, on_duplicate: Optional[str] = None) -> Receipt:
+        mode = on_duplicate or self.on_duplicate
+        receipt = Receipt(
+            id=str(uuid.uuid4()),
+            created_at=datetime.utcnow(),
+            **payload.model_dump()
+        )
+        if self.user_id is not None:
+            receipt.user_id = self.user_id
+        with self._lock:
+            self._check_open()
+            if mode != "allow":
+                match = self.dedup.check_and_add(receipt, receipt.id)
+                if match is not None:
+                    if mode == "reject":
+                        raise DuplicateReceiptError(match)
+                    receipt.duplicate_of = match.receipt_id
+            self._append(receipt)
+        return receipt
+
+    def add_many(self, payloads: Iterable[ReceiptCreate], on_duplicate: Optional[str] = None) -> List[Receipt]:
+        """중복으로 거부된 항목은 건너뛰고 저장된 영수증만 반환"""
+        added = []
+        for p in payloads:
+            try:
+                added.append(self.add(p, on_duplicate))
+            except DuplicateReceiptError:
+                continue
+        return added
+
+    def restore(self, receipts: Iterable[Receipt]):
+        """이미 저장됐던 영수증(id 유지)으로 색인과 집계를 다시 구성"""
+        with self._lock:
+            self._check_open()
+            for receipt in receipts:
+                if receipt.duplicate_of is None:
+                    self.dedup.check_and_add(receipt, receipt.id)
+                self._append(receipt)
+
+    def dedup_backfill(self, mode: str = "reject") -> int:
+        """기존 데이터의 중복을 제거(reject)하거나 표시(flag)하고 중복 건수를 반환"""
+        with self._lock:
+            self._check_open()
+            self.dedup = DedupIndex()
+            kept, duplicates = [], 0
+            for receipt in self._rows:
+                match = None if receipt.duplicate_of else self.dedup.check_and_add(receipt, receipt.id)
+                if receipt.duplicate_of or match is not None:
+                    duplicates += 1
+                    if mode == "flag" and match is not None:
+                        receipt.duplicate_of = match.receipt_id
+                        self.aggregates.remove(receipt)
+                        self.alerts.remove(receipt)
+                else:
+                    kept.append(receipt)
+            if mode == "reject":
+                self._rows = []
+                self.index.clear()
+                self.aggregates.clear()
+                self.line_items.clear()
+                self.alerts.clear()
+                for receipt in kept:
+                    self._append(receipt)
+            elif duplicates:
+                self.line_items.clear()
+                for receipt in kept:
+                    self.line_items.add(receipt)
+            return duplicates
+
+    def query(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        category: Optional[str] = None,
+        q: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Receipt]:
+        filtered = bool(from_date or to_date or category)
+        with self._lock:
+            if q:
+                # 검색어가 있으면 점수 순으로 정렬된 결과에서 필터링 (필터가 없으면 상위 limit개만 점수화)
+                hits = self.index.search(q, None if filtered else limit)
+                data = [self._rows[doc_id] for doc_id, _ in hits]
+            else:
+                data = self._rows
+            if from_date:
+                data = [r for r in data if r.date >= from_date]
+            if to_date:
+                data = [r for r in data if r.date <= to_date]
+            if category:
+                data = [r for r in data if r.category == category]
+            return list(data)
+
+    def latest(self, limit: int) -> List[Receipt]:
+        with self._lock:
+            return self._rows[-limit:][::-1]
+
+    def stats(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        max_points: Optional[int] = None,
+        granularity: str = "auto",
+    ) -> dict:
+        with self._lock:
+            stats = self.aggregates.stats(from_date, to_date)
+        if max_points or granularity != "auto":
+            daily = pd.Series(
+                [d["amount"] for d in stats["daily_series"]],
+                index=[d["date"] for d in stats["daily_series"]],
+                dtype="int64",
+            )
+            daily, stats["granularity"] = downsample_series(daily, max_points, granularity)
+            stats["daily_series"] = [{"date": d, "amount": int(a)} for d, a in daily.items()]
+        return stats
+
+    def item_frame(self, from_date: Optional[str] = None, to_date: Optional[str] = None) -> pd.DataFrame:
+        with self._lock:
+            return self.line_items.to_frame(from_date, to_date)
+
+    def recent_alerts(
+        self,
+        limit: Optional[int] = None,
+        kind: Optional[str] = None,
+        receipt_id: Optional[str] = None,
+    ) -> List[Alert]:
+        with self._lock:
+            return self.alerts.alerts(limit, kind, receipt_id)
+
+    def budget_status(self, month: Optional[str] = None) -> dict:
+        with self._lock:
+            return self.alerts.budget_status(month)
+
+    def set_budgets(self, budgets: Dict[str, Optional[int]]) -> dict:
+        """예산을 바꾸고 바뀐 뒤의 현황을 반환"""
+        with self._lock:
+            self.alerts.set_budgets(budgets)
+            return self.alerts.budget_status()
+
+    def iter_batches(self, batch_size: int, rows: Optional[List[Receipt]] = None) -> Iterator[List[Receipt]]:
+        if rows is None:
+            with self._lock:
+                rows = list(self._rows)
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+
+class TenantStore:
+    """
+    사용자별로 분리된 ReceiptStore 모음
+
+    각 파티션은 자기 색인/중복 검사/집계를 따로 가지므로 조회 비용은 해당 사용자의
+    데이터 양에만 비례합니다. 메모리에 올라와 있는 파티션이 max_partitions를 넘으면
+    가장 오래 사용하지 않은 파티션을 spill_dir에 JSONL로 내려놓고, 다음 접근 때 다시 읽습니다.
+
+    요청 처리 중에는 use()로 파티션을 고정(pin)해 두어야 합니다. 고정된 파티션은 내려놓지 않으며,
+    고정 없이 partition()으로 받은 파티션이 그사이 내려놓아졌다면 쓰기는 PartitionEvictedError로 거부됩니다.
+
+    파일 읽기/쓰기는 전역 잠금 밖에서 합니다. 읽거나 내려놓는 중인 사용자는 _busy에 표시해 두고,
+    같은 사용자의 다른 요청만 그 작업이 끝날 때까지 기다립니다 (다른 사용자의 요청은 막히지 않음).
+    """
+
+    def __init__(
+        self,
+        max_partitions: int = DEFAULT_MAX_PARTITIONS,
+        spill_dir: Optional[str] = None,
+        on_duplicate: str = "reject",
+    ):
+        self.max_partitions = max(1, max_partitions)
+        self.on_duplicate = on_duplicate
+        self._spill_dir = spill_dir
+        self._owns_spill_dir = spill_dir is None
+        self._partitions: "OrderedDict[str, ReceiptStore]" = OrderedDict()
+        # 예산 설정은 작아서 파티션을 내려놓아도 메모리에 유지
+        self._budgets: Dict[str, Dict[str, int]] = {}
+        # user_id -> 현재 파티션을 사용 중인 요청 수
+        self._pins: Dict[str, int] = {}
+        # user_id -> 파일에서 읽거나 파일로 내려놓는 중임을 알리는 이벤트 (끝나면 set)
+        self._busy: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def resident_users(self) -> List[str]:
+        return list(self._partitions)
+
+    def _spill_path(self, user_id: str) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="receipt-partitions-")
+        os.makedirs(self._spill_dir, exist_ok=True)
+        name = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self._spill_dir, f"{name}.jsonl")
+
+    def _evict(self, path: str, partition: ReceiptStore):
+        rows = partition.close()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for receipt in rows:
+                f.write(receipt.model_dump_json() + "\n")
+        os.replace(tmp, path)
+
+    def _load(self, user_id: str, path: Optional[str], budgets: Dict[str, int]) -> ReceiptStore:
+        partition = ReceiptStore(self.on_duplicate, user_id=user_id, budgets=budgets)
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                partition.restore(Receipt.model_validate_json(line) for line in f if line.strip())
+            os.remove(path)
+        return partition
+
+    def _take_victims(self, keep: Optional[str]) -> List[Tuple[str, str, ReceiptStore]]:
+        """
+        고정되지 않은 파티션을 오래된 순으로 빼서 (user_id, 파일 경로, 파티션) 목록으로 반환
+
+        전역 잠금 안에서 호출하며, 실제 쓰기는 호출한 쪽이 잠금 밖에서 _spill()로 합니다.
+        모두 고정돼 있으면 잠시 max_partitions를 넘깁니다.
+        """
+        victims = []
+        for cold_user in list(self._partitions):
+            if len(self._partitions) <= self.max_partitions:
+                break
+            if cold_user == keep or self._pins.get(cold_user):
+                continue
+            self._busy[cold_user] = threading.Event()
+            victims.append((cold_user, self._spill_path(cold_user), self._partitions.pop(cold_user)))
+        return victims
+
+    def _spill(self, victims: List[Tuple[str, str, ReceiptStore]]):
+        for user_id, path, partition in victims:
+            try:
+                self._evict(path, partition)
+            finally:
+                with self._lock:
+                    self._busy.pop(user_id).set()
+
+    def _checkout(self, user_id: str, pin: bool) -> ReceiptStore:
+        while True:
+            with self._lock:
+                partition = self._partitions.get(user_id)
+                if partition is not None:
+                    self._partitions.move_to_end(user_id)
+                    if pin:
+                        self._pins[user_id] = self._pins.get(user_id, 0) + 1
+                    victims = self._take_victims(user_id)
+                    break
+                busy = self._busy.get(user_id)
+                if busy is None:
+                    # 이 스레드가 읽어 옴
+                    busy = self._busy[user_id] = threading.Event()
+                    path = self._spill_path(user_id) if self._spill_dir is not None else None
+                    budgets = self._budgets.setdefault(user_id, {})
+                    loading = True
+                else:
+                    loading = False
+            if not loading:
+                busy.wait()
+                continue
+            try:
+                partition = self._load(user_id, path, budgets)
+            except BaseException:
+                with self._lock:
+                    self._busy.pop(user_id).set()
+                raise
+            with self._lock:
+                self._partitions[user_id] = partition
+                if pin:
+                    self._pins[user_id] = self._pins.get(user_id, 0) + 1
+                self._busy.pop(user_id).set()
+                victims = self._take_victims(user_id)
+            break
+        self._spill(victims)
+        return partition
+
+    def partition(self, user_id: Optional[str] = None) -> ReceiptStore:
+        """고정하지 않고 파티션을 반환 (단일 스레드 작업용, 요청 처리에는 use()를 사용)"""
+        return self._checkout(user_id or DEFAULT_USER, pin=False)
+
+    @contextmanager
+    def use(self, user_id: Optional[str] = None) -> Iterator[ReceiptStore]:
+        """with 블록 동안 파티션을 고정해 내려놓지 않도록 함"""
+        user_id = user_id or DEFAULT_USER
+        partition = self._checkout(user_id, pin=True)
+        try:
+            yield partition
+        finally:
+            with self._lock:
+                pins = self._pins.pop(user_id) - 1
+                if pins:
+                    self._pins[user_id] = pins
+                victims = self._take_victims(None)
+            self._spill(victims)
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+            self._budgets.clear()
+            if self._spill_dir is None:
+                return
+            if self._owns_spill_dir:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+            else:
+                for name in os.listdir(self._spill_dir):
+                    if name.endswith(".jsonl"):
+                        os.remove(os.path.join(self._spill_dir, name))
@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+
+from alerts import AlertEngine, RunningStats
+
+
+def _receipt(amount, date="2026-03-02", category="식비", receipt_id=None):
+    return {"id": receipt_id, "date": date, "store": "s", "amount": amount, "category": category}
+
+
+def test_running_stats_matches_numpy_with_removal():
+    rng = random.Random(7)
+    values = [rng.randint(1000, 50000) for _ in range(200)]
+    stats = RunningStats()
+    for v in values:
+        stats.add(v)
+    for v in values[:50]:
+        stats.remove(v)
+    assert stats.count == 150
+    assert np.isclose(stats.mean, np.mean(values[50:]))
+    assert np.isclose(stats.std, np.std(values[50:], ddof=1))
+
+
+def test_outlier_flagged_against_prior_history_only():
+    engine = AlertEngine(min_samples=5)
+    for i, amount in enumerate([5000, 5200, 4800, 5100, 4900]):
+        assert engine.observe(_receipt(amount, receipt_id=str(i))) == []
+    # 다른 카테고리는 따로 집계
+    assert engine.observe(_receipt(90000, category="교통비")) == []
+
+    alerts = engine.observe(_receipt(9000, receipt_id="big"))
+    assert [(a.kind, a.receipt_id, a.category) for a in alerts] == [("outlier", "big", "식비")]
+    assert alerts[0].mean == 5000 and alerts[0].zscore > 3
+    assert engine.alerts(kind="outlier")[0].receipt_id == "big"
+
+
+def test_budget_alert_fires_once_per_month_and_on_new_budget():
+    engine = AlertEngine(budgets={"식비": 10000})
+    assert engine.observe(_receipt(6000)) == []
+    first = engine.observe(_receipt(6000, receipt_id="over"))
+    assert [(a.kind, a.receipt_id, a.amount, a.budget) for a in first] == [("budget", "over", 12000, 10000)]
+    assert engine.observe(_receipt(1000)) == []
+    # 다음 달은 카운터가 새로 시작
+    assert engine.observe(_receipt(6000, date="2026-04-01")) == []
+
+    # 이미 넘긴 전체 예산을 설정하면 바로 알림
+    raised = engine.set_budgets({"total": 5000})
+    assert [(a.category, a.amount) for a in raised] == [(None, 6000)]
+    assert engine.budget_status() == {
+        "month": "2026-04", "budgets": {"식비": 10000, "total": 5000}, "spent": {"식비": 6000, "total": 6000},
+    }
+    assert engine.budget_status("2026-03")["spent"] == {"식비": 13000, "total": 13000}
+
+
+def test_remove_and_clear_keep_budgets():
+    budgets = {"식비": 100}
+    engine = AlertEngine(budgets=budgets)
+    engine.observe(_receipt(80))
+    engine.remove(_receipt(80))
+    assert engine.budget_status()["spent"] == {"식비": 0, "total": 0}
+    engine.clear()
+    assert engine.alerts() == [] and engine.budgets is budgets
@@ -1,6 +1,11 @@
 import pandas as pd
+import pytest
 
-from analytics import to_df, calc_total, calc_daily, calc_category, calc_top_category, summary_stats
+from analytics import (
+    to_df, calc_total, calc_daily, calc_category, calc_top_category, summary_stats,
+    DEFAULT_LTTB_POINTS, bucket_series, downsample_series, lttb,
+    items_to_df, calc_top_items, calc_unit_price_trend, calc_basket_size,
+)
 
 
 def test_analytics_basic():
@@ -40,3 +45,77 @@ def test_analytics_empty():
     top_cat, top_amt = calc_top_category(df)
     assert top_cat is None
     assert top_amt == 0
+
+
+def _daily(start, end):
+    idx = pd.date_range(start, end, freq="D")
+    return pd.Series(range(1, len(idx) + 1), index=idx.strftime("%Y-%m-%d"))
+
+
+def test_bucket_series_keeps_totals():
+    daily = _daily("2026-01-01", "2026-03-31")
+    weekly = bucket_series(daily, "week")
+    monthly = bucket_series(daily, "month")
+    assert weekly.sum() == monthly.sum() == daily.sum()
+    assert weekly.index[0] == "2025-12-29"
+    assert list(monthly.index) == ["2026-01-01", "2026-02-01", "2026-03-01"]
+
+
+def test_downsample_series_bounds_points():
+    daily = _daily("2020-01-01", "2026-02-24")
+    series, granularity = downsample_series(daily, max_points=400)
+    assert granularity == "week"
+    assert len(series) <= 400
+    series, granularity = downsample_series(daily, max_points=50)
+    assert granularity == "lttb"
+    assert len(series) == 50
+
+    series, granularity = downsample_series(daily, granularity="lttb")
+    assert granularity == "lttb"
+    assert len(series) == DEFAULT_LTTB_POINTS
+    with pytest.raises(ValueError):
+        downsample_series(daily, granularity="year")
+
+    short = _daily("2026-02-01", "2026-02-24")
+    series, granularity = downsample_series(short, max_points=400)
+    assert granularity == "day"
+    assert series.equals(short)
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    daily = _daily("2026-01-01", "2026-12-31") * 0
+    daily.iloc[100] = 99999
+    sampled = lttb(daily, 20)
+    assert len(sampled) == 20
+    assert sampled.index[0] == daily.index[0]
+    assert sampled.index[-1] == daily.index[-1]
+    assert sampled.max() == 99999
+
+
+ITEM_RECEIPTS = [
+    {"date": "2026-01-05", "items": [{"name": "아메리카노", "qty": 2, "price": 4500}, {"name": "라떼", "qty": 1, "price": 5000}]},
+    {"date": "2026-02-03", "items": [{"name": "아메리카노", "qty": 1, "price": 4800}]},
+    {"date": "2026-02-10", "items": None},
+]
+
+
+def test_line_item_analytics():
+    items = items_to_df(ITEM_RECEIPTS)
+    assert len(items) == 3
+
+    top = calc_top_items(items, n=1)
+    assert top.to_dict(orient="records") == [{"name": "아메리카노", "spend": 13800, "qty": 3, "lines": 2}]
+
+    trend = calc_unit_price_trend(items, "month", name="아메리카노")
+    assert trend.loc["2026-01"] == 4500
+    assert trend.loc["2026-02"] == 4800
+
+    basket = calc_basket_size(items)
+    assert basket.to_dict() == {1: 1, 3: 1}
+
+
+def test_line_item_analytics_empty():
+    items = items_to_df([])
+    assert calc_top_items(items).empty
+    assert calc_unit_price_trend(items).empty
+    assert calc_basket_size(items).empty
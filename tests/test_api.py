@@ -66,3 +66,160 @@ def test_stats_endpoint():
     assert stats["top_category"] in {"식비", "쇼핑"}
     assert len(stats["daily_series"]) == 2
     assert len(stats["category_series"]) == 2
+
+
+def test_export_and_import_round_trip():
+    for store in ["A", "B", "C"]:
+        payload = {"date": "2026-02-24", "store": store, "amount": 1000, "category": "식비"}
+        assert client.post("/api/receipts", json=payload).status_code == 200
+
+    export_resp = client.get("/api/receipts/export", params={"format": "csv", "batch_size": 2})
+    assert export_resp.status_code == 200
+    assert export_resp.headers["content-type"].startswith("text/csv")
+
+    api_app.DB.clear()
+    import_resp = client.post(
+        "/api/receipts/import",
+        files={"file": ("receipts.csv", export_resp.content, "text/csv")},
+    )
+    assert import_resp.status_code == 200
+    assert import_resp.json()["imported"] == 3
+    assert len(client.get("/api/receipts").json()) == 3
+
+
+def test_search_receipts():
+    payloads = [
+        {"date": "2026-02-24", "store": "스타벅스 강남점", "amount": 9500, "category": "식비",
+         "items": [{"name": "아메리카노", "qty": 1, "price": 4500}]},
+        {"date": "2026-02-23", "store": "이마트", "amount": 30000, "category": "쇼핑",
+         "raw_text": "이마트\n스타벅스 원두 1봉"},
+        {"date": "2026-02-22", "store": "Metro", "amount": 1400, "category": "교통비"},
+    ]
+    for p in payloads:
+        assert client.post("/api/receipts", json=p).status_code == 200
+
+    resp = client.get("/api/receipts", params={"q": "스타벅스"})
+    assert [r["store"] for r in resp.json()] == ["스타벅스 강남점", "이마트"]
+
+    resp = client.get("/api/receipts", params={"q": "스타벅스", "category": "쇼핑"})
+    assert [r["store"] for r in resp.json()] == ["이마트"]
+
+    resp = client.get("/api/receipts", params={"q": "아메리카노"})
+    assert len(resp.json()) == 1
+
+
+def test_duplicate_receipts_rejected_or_flagged():
+    payload = {"date": "2026-02-24", "store": "A", "amount": 1000, "category": "식비", "raw_text": "A 2026-02-24 합계 1,000원"}
+    first = client.post("/api/receipts", json=payload).json()
+
+    resp = client.post("/api/receipts", json=payload)
+    assert resp.status_code == 409
+    assert resp.json()["detail"]["receipt_id"] == first["id"]
+
+    resp = client.post("/api/receipts", json=payload, params={"on_duplicate": "flag"})
+    assert resp.status_code == 200
+    assert resp.json()["duplicate_of"] == first["id"]
+
+    stats = client.get("/api/receipts/stats").json()
+    assert stats["count"] == 1
+
+
+def test_dedup_backfill():
+    payload = {"date": "2026-02-24", "store": "A", "amount": 1000, "category": "식비"}
+    for _ in range(3):
+        assert client.post("/api/receipts", json=payload, params={"on_duplicate": "allow"}).status_code == 200
+
+    resp = client.post("/api/receipts/dedup")
+    assert resp.json() == {"mode": "reject", "duplicates": 2, "remaining": 1}
+    assert len(client.get("/api/receipts").json()) == 1
+
+
+def test_receipts_are_partitioned_by_user():
+    payload = {"date": "2026-02-24", "store": "A", "amount": 1000, "category": "식비"}
+    assert client.post("/api/receipts", json=payload, headers={"X-User-Id": "alice"}).status_code == 200
+    assert client.post("/api/receipts", json={**payload, "amount": 2000}, headers={"X-User-Id": "bob"}).status_code == 200
+
+    alice = client.get("/api/receipts", headers={"X-User-Id": "alice"}).json()
+    assert [r["amount"] for r in alice] == [1000]
+    assert alice[0]["user_id"] == "alice"
+
+    stats = client.get("/api/receipts/stats", headers={"X-User-Id": "bob"}).json()
+    assert stats["total_amount"] == 2000
+    assert client.get("/api/receipts").json() == []
+
+    # 사용자는 헤더로만 정해지고 본문의 user_id는 무시됨
+    spoofed = {**payload, "amount": 3000, "user_id": "bob"}
+    assert client.post("/api/receipts", json=spoofed, headers={"X-User-Id": "alice"}).json()["user_id"] == "alice"
+    assert client.post("/api/receipts", json=spoofed).json()["user_id"] == "default"
+    assert client.get("/api/receipts/stats", headers={"X-User-Id": "bob"}).json()["total_amount"] == 2000
+
+
+def test_stats_downsampling():
+    for day in range(1, 29):
+        payload = {"date": f"2026-02-{day:02d}", "store": f"S{day}", "amount": 100, "category": "식비"}
+        assert client.post("/api/receipts", json=payload).status_code == 200
+
+    stats = client.get("/api/receipts/stats", params={"max_points": 10}).json()
+    assert stats["granularity"] == "week"
+    assert len(stats["daily_series"]) <= 10
+    assert sum(d["amount"] for d in stats["daily_series"]) == stats["total_amount"] == 2800
+
+    monthly = client.get("/api/receipts/stats", params={"granularity": "month"}).json()
+    assert monthly["daily_series"] == [{"date": "2026-02-01", "amount": 2800}]
+
+
+def test_item_stats_endpoint():
+    payloads = [
+        {"date": "2026-01-05", "store": "A", "amount": 14000, "category": "식비",
+         "items": [{"name": "아메리카노", "qty": 2, "price": 4500}, {"name": "라떼", "qty": 1, "price": 5000}]},
+        {"date": "2026-02-03", "store": "B", "amount": 4800, "category": "식비",
+         "items": [{"name": "아메리카노", "qty": 1, "price": 4800}]},
+    ]
+    for p in payloads:
+        assert client.post("/api/receipts", json=p).status_code == 200
+
+    stats = client.get("/api/receipts/items/stats", params={"item": "아메리카노"}).json()
+    assert stats["line_items"] == 3
+    assert stats["top_items"][0] == {"name": "아메리카노", "spend": 13800, "qty": 3, "lines": 2}
+    assert stats["unit_price_series"] == [
+        {"period": "2026-01", "avg_unit_price": 4500.0},
+        {"period": "2026-02", "avg_unit_price": 4800.0},
+    ]
+    assert stats["basket_size"] == [{"size": 1, "count": 1}, {"size": 3, "count": 1}]
+
+
+def test_alerts_and_budgets_endpoints():
+    for i, amount in enumerate([5000, 5200, 4800, 5100, 4900, 30000]):
+        payload = {"date": f"2026-03-{i + 1:02d}", "store": f"Cafe {i}", "amount": amount, "category": "식비"}
+        assert client.post("/api/receipts", json=payload).status_code == 200
+
+    alerts = client.get("/api/alerts").json()
+    assert [a["kind"] for a in alerts] == ["outlier"]
+    assert alerts[0]["amount"] == 30000
+
+    status = client.put("/api/budgets", json={"식비": 50000, "total": 0}).json()
+    assert status == {"month": "2026-03", "budgets": {"식비": 50000}, "spent": {"식비": 55000, "total": 55000}}
+    assert client.get("/api/alerts", params={"kind": "budget"}).json()[0]["budget"] == 50000
+    assert client.put("/api/budgets", json={"커피": 1000}).status_code == 400
+
+    # 다른 사용자 파티션에는 영향 없음
+    assert client.get("/api/alerts", headers={"X-User-Id": "bob"}).json() == []
+    assert client.get("/api/budgets", headers={"X-User-Id": "bob"}).json()["budgets"] == {}
+
+
+def test_list_latest_without_copying_rows(monkeypatch):
+    for day in range(1, 6):
+        payload = {"date": f"2026-02-{day:02d}", "store": f"S{day}", "amount": 100 * day, "category": "식비"}
+        assert client.post("/api/receipts", json=payload).status_code == 200
+
+    # 필터 없는 최근 목록은 query()로 전체를 복사하지 않고 latest()로 처리
+    def no_full_scan(*args, **kwargs):
+        raise AssertionError("query() should not run")
+
+    with monkeypatch.context() as m:
+        m.setattr(api_app.ReceiptStore, "query", no_full_scan)
+        resp = client.get("/api/receipts", params={"order": "desc", "limit": 2})
+    assert [r["store"] for r in resp.json()] == ["S5", "S4"]
+
+    filtered = client.get("/api/receipts", params={"order": "desc", "limit": 2, "to_date": "2026-02-03"})
+    assert [r["store"] for r in filtered.json()] == ["S3", "S2"]
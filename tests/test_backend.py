@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api_app
+from backend import HttpBackend, LocalBackend, make_backend
+from dedup import DuplicateReceiptError
+
+RECEIPT = {"date": "2026-02-24", "store": "스타벅스 강남점", "amount": 9500, "category": "식비", "raw_text": "스타벅스 강남점 합계 9,500원"}
+
+
+def setup_function():
+    api_app.DB.clear()
+
+
+@pytest.fixture(params=["local", "http"])
+def backend(request):
+    """같은 api_app 저장소를 보는 두 백엔드 (사용자 alice)"""
+    if request.param == "local":
+        return LocalBackend("alice")
+    return HttpBackend(user_id="alice", client=TestClient(api_app.app))
+
+
+def test_backend_shares_api_store(backend):
+    backend.add(RECEIPT)
+    backend.add({**RECEIPT, "store": "Metro", "amount": 1400, "category": "교통비", "raw_text": None})
+    with pytest.raises(DuplicateReceiptError):
+        backend.add(RECEIPT)
+
+    stats = backend.stats()
+    assert stats["total_amount"] == 10900
+    assert stats["category_series"][0] == {"category": "식비", "amount": 9500}
+    assert [r["store"] for r in backend.list(1)] == ["Metro"]
+
+    # 같은 저장소를 API로도 볼 수 있어야 함
+    assert len(api_app.DB.partition("alice")) == 2
+
+
+def test_backend_alerts_and_budgets(backend):
+    backend.add(RECEIPT)
+    status = backend.set_budgets({"식비": 5000})
+    assert status["budgets"] == {"식비": 5000}
+    assert backend.budgets()["spent"]["식비"] == 9500
+    assert [a["kind"] for a in backend.alerts()] == ["budget"]
+
+
+def test_backend_export_and_monthly_series(backend):
+    backend.add(RECEIPT)
+    backend.add({**RECEIPT, "date": "2026-03-02", "store": "Metro", "amount": 1400, "category": "교통비", "raw_text": None})
+
+    csv_text = b"".join(backend.export("csv")).decode("utf-8-sig")
+    assert csv_text.count("\n") == 3
+    assert "스타벅스 강남점" in csv_text and "Metro" in csv_text
+
+    assert backend.stats()["monthly_series"] == [
+        {"month": "2026-02", "category": "식비", "amount": 9500, "count": 1},
+        {"month": "2026-03", "category": "교통비", "amount": 1400, "count": 1},
+    ]
+
+
+def test_make_backend_rejects_unknown_mode():
+    assert make_backend("session") is None
+    assert isinstance(make_backend("LOCAL", user_id="alice"), LocalBackend)
+    with pytest.raises(ValueError):
+        make_backend("locl")
@@ -0,0 +1,90 @@
+import json
+
+import bulk_import
+
+
+def _write_texts(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"text": f"Market\n2026-02-{i % 28 + 1:02d}\n합계: {1000 + i}원"}, ensure_ascii=False) + "\n")
+
+
+def test_bulk_import_and_resume(tmp_path):
+    src = tmp_path / "texts.jsonl"
+    out = tmp_path / "receipts.jsonl"
+    _write_texts(src, 10)
+
+    argv = [str(src), "--output", str(out), "--workers", "1", "--batch-size", "4"]
+    bulk_import.main(argv)
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["amount"] for r in rows] == [1000 + i for i in range(10)]
+    assert rows[0]["category"] == "쇼핑"
+
+    # 크래시를 흉내: 체크포인트를 앞 배치로 되돌리고 출력 끝에 불완전한 줄을 남김
+    ckpt = tmp_path / "receipts.jsonl.ckpt"
+    state = json.loads(ckpt.read_text())
+    lines = out.read_bytes().splitlines(keepends=True)
+    state.update(done=4, output_bytes=sum(len(line) for line in lines[:4]))
+    ckpt.write_text(json.dumps(state))
+    with open(out, "ab") as f:
+        f.write(b'{"partial"')
+
+    bulk_import.main(argv)
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["amount"] for r in rows] == [1000 + i for i in range(10)]
+
+
+def test_invalid_llm_result_keeps_local_parse(tmp_path, monkeypatch):
+    src = tmp_path / "texts.jsonl"
+    out = tmp_path / "receipts.jsonl"
+    with open(src, "w", encoding="utf-8") as f:
+        for text in ["???\n100", "???\n200", "???\n300"]:
+            f.write(json.dumps({"text": text}, ensure_ascii=False) + "\n")
+
+    replies = {
+        "100": {"date": "2026-02-01", "store": "A", "amount": 100, "category": "groceries"},
+        "200": {"date": "2026-02-02", "store": "B", "amount": -5, "category": "식비"},
+        "300": {"date": "2026-02-03", "store": "C", "amount": 300, "category": "식비", "raw_text": "x", "items": "?"},
+    }
+    monkeypatch.setattr(bulk_import, "make_openai_client", lambda: object())
+    monkeypatch.setattr(bulk_import, "llm_extract", lambda client, text: replies[text.split()[-1]])
+
+    argv = [str(src), "--output", str(out), "--workers", "1", "--llm", "--llm-concurrency", "1"]
+    bulk_import.main(argv)
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["store"], r["amount"], r["category"]) for r in rows] == [
+        ("???", 100, "기타"), ("???", 200, "기타"), ("C", 300, "식비"),
+    ]
+    assert rows[2]["raw_text"] == "???\n300"
+
+
+def test_api_upload_gets_default_checkpoint(tmp_path, monkeypatch):
+    src = tmp_path / "texts.jsonl"
+    _write_texts(src, 5)
+    uploaded = []
+    monkeypatch.setattr(bulk_import.BatchWriter, "write", lambda self, receipts: uploaded.extend(receipts))
+
+    argv = [str(src), "--api-url", "http://localhost:8000", "--workers", "1", "--batch-size", "2"]
+    bulk_import.main(argv)
+    assert len(uploaded) == 5
+    assert json.loads((tmp_path / "texts.jsonl.ckpt").read_text())["done"] == 5
+
+    # 같은 명령을 다시 실행하면 이미 올린 행은 건너뜀
+    bulk_import.main(argv)
+    assert len(uploaded) == 5
+
+
+def test_api_upload_sends_user_id(tmp_path, monkeypatch):
+    import httpx
+    from fastapi.testclient import TestClient
+
+    import api_app
+
+    api_app.DB.clear()
+    src = tmp_path / "texts.jsonl"
+    _write_texts(src, 3)
+    monkeypatch.setattr(httpx, "Client", lambda headers=None, **kwargs: TestClient(api_app.app, headers=headers))
+
+    bulk_import.main([str(src), "--api-url", "http://testserver", "--user-id", "alice", "--workers", "1"])
+    assert len(api_app.DB.partition("alice")) == 3
+    assert len(api_app.DB.partition()) == 0
@@ -0,0 +1,57 @@
+from dedup import DedupIndex, fingerprint
+
+RAW = "스타벅스 강남점\n2026-02-24\n아메리카노 4,500원\n카페라떼 5,000원\n합계: 9,500원\n카드결제 승인번호 12345678"
+
+
+def test_fingerprint_normalizes_fields():
+    a = {"date": "2026-02-24", "store": "Starbucks  Gangnam", "amount": 9500,
+         "items": [{"name": "Latte", "qty": 1, "price": 5000}, {"name": "Americano", "qty": 1, "price": 4500}]}
+    b = {"date": "2026-02-24", "store": "starbucks gangnam!", "amount": 9500,
+         "items": [{"name": "americano", "qty": 1, "price": 4500}, {"name": "latte", "qty": 1, "price": 5000}]}
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint({**a, "amount": 9000})
+
+
+def test_exact_and_near_duplicates():
+    index = DedupIndex()
+    first = {"date": "2026-02-24", "store": "스타벅스 강남점", "amount": 9500, "raw_text": RAW}
+    assert index.check_and_add(first, "r1") is None
+
+    match = index.check_and_add(dict(first), "r2")
+    assert (match.kind, match.receipt_id) == ("exact", "r1")
+
+    # 같은 영수증을 다시 OCR해 승인번호 한 자리와 금액을 다르게 읽은 경우
+    near = {**first, "amount": 4500, "raw_text": RAW.replace("12345678", "12345679")}
+    match = index.check_and_add(near, "r3")
+    assert (match.kind, match.receipt_id) == ("near", "r1")
+    assert 0.9 <= match.similarity < 1.0
+
+    # 같은 가게의 다른 날 영수증은 중복이 아님
+    same_store = {
+        "date": "2026-02-25", "store": "스타벅스 강남점", "amount": 5000,
+        "raw_text": "스타벅스 강남점\n2026-02-25\n카페라떼 5,000원\n합계: 5,000원\n카드결제 승인번호 55554444",
+    }
+    assert index.check_and_add(same_store, "r5") is None
+
+    other = {"date": "2026-02-23", "store": "Metro", "amount": 1400, "raw_text": "지하철 1호선 교통카드 충전 1,400원"}
+    assert index.check_and_add(other, "r4") is None
+    assert len(index) == 3
+
+
+def test_same_chain_boilerplate_on_different_days_is_not_duplicate():
+    header = "스타벅스 강남점\n서울특별시 강남구 강남대로 390\n사업자번호 201-81-21515 대표 손정현\n"
+    footer = "\n신한카드 일시불\n적립 스타 1개\n감사합니다. 다음에 또 방문해 주세요.\n스타벅스 앱으로 주문하세요"
+    index = DedupIndex()
+    for day in range(1, 29):
+        date = f"2026-02-{day:02d}"
+        receipt = {
+            "date": date, "store": "스타벅스 강남점", "amount": 4500,
+            "raw_text": f"{header}{date} 08:1{day % 10}\n아메리카노 4,500원\n합계: 4,500원{footer}",
+        }
+        assert index.check_and_add(receipt, date) is None
+    assert len(index) == 28
+
+    # 같은 날 다시 OCR한 같은 영수증은 여전히 유사 중복
+    rescanned = {**receipt, "amount": 4800, "raw_text": receipt["raw_text"].replace("적립 스타 1개", "적립 스타 I개")}
+    match = index.check_and_add(rescanned, "again")
+    assert (match.kind, match.receipt_id) == ("near", "2026-02-28")
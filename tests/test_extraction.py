@@ -0,0 +1,40 @@
+from extraction import fallback_extract, fallback_extract_scored, map_category, strip_code_fence
+
+
+def test_fallback_extract_receipt():
+    text = "스타벅스 강남점\n2026-02-24\n아메리카노 4,500원\n카페라떼 5,000원\n합계: 9,500원"
+    result, confidence = fallback_extract_scored(text)
+    assert result == {"date": "2026-02-24", "store": "스타벅스 강남점", "amount": 9500, "category": "식비"}
+    assert confidence == 1.0
+
+
+def test_fallback_extract_low_confidence():
+    result, confidence = fallback_extract_scored("???")
+    assert result["category"] == "기타"
+    assert confidence < 0.6
+    assert fallback_extract("???") == result
+
+
+def test_helpers():
+    assert map_category("Transport") == "교통비"
+    assert map_category("") == "기타"
+    assert strip_code_fence('```json\n{"a": 1}\n```') == '{"a": 1}'
+
+
+def test_fallback_extract_ignores_approval_number():
+    text = "스타벅스 강남점\n2026-02-24\n아메리카노 4,500원\n카페라떼 5,000원\n총: 9,500원\n카드결제 승인번호 12345678"
+    result, confidence = fallback_extract_scored(text)
+    assert result["amount"] == 9500
+    assert confidence < 1.0
+
+    labelled = text.replace("총:", "결제금액:")
+    assert fallback_extract_scored(labelled) == (dict(result), 1.0)
+
+
+def test_fallback_extract_prefers_last_full_total():
+    english = "Cafe Nero\n2026-02-24\nLatte 9,000\nSubtotal: 9,000\nTax: 900\nTotal: 9,900"
+    result, confidence = fallback_extract_scored(english)
+    assert (result["amount"], confidence) == (9900, 1.0)
+
+    korean = "스타벅스 강남점\n2026-02-24\n공급가액합계 9,000원\n부가세 합계 900원\n받을금액 9,900원"
+    assert fallback_extract_scored(korean)[0]["amount"] == 9900
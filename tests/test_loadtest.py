@@ -0,0 +1,70 @@
+import os
+
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+import api_app
+import loadtest
+from fake_openai import FakeOpenAIServer
+
+
+def setup_function():
+    api_app.DB.clear()
+
+
+def teardown_function():
+    api_app.app.dependency_overrides.clear()
+
+
+def _use_fake(server, max_retries=0):
+    llm = openai.OpenAI(api_key="fake-key", base_url=server.url, max_retries=max_retries)
+    api_app.app.dependency_overrides[api_app.get_llm_client] = lambda: llm
+
+
+TEXT = "메가커피 카페\n2026-03-02 09:10\n아메리카노 x2 4,000원\n합계: 4,000원"
+
+
+def test_extract_uses_fake_llm():
+    with FakeOpenAIServer() as server:
+        _use_fake(server)
+        resp = TestClient(api_app.app).post("/api/receipts/extract", json={"text": TEXT})
+    body = resp.json()
+    assert body["extractor"] == "llm"
+    assert (body["date"], body["store"], body["amount"], body["category"]) == ("2026-03-02", "메가커피 카페", 4000, "식비")
+    assert server.counts["ok"] == 1
+
+
+@pytest.mark.parametrize("knob, status", [("error_rate", "errors"), ("rate_limit_rate", "rate_limited")])
+def test_extract_falls_back_on_injected_failures(knob, status):
+    with FakeOpenAIServer(**{knob: 1.0}) as server:
+        _use_fake(server, max_retries=1)
+        body = TestClient(api_app.app).post("/api/receipts/extract", json={"text": TEXT}).json()
+    assert body["extractor"] == "fallback"
+    assert body["amount"] == 4000
+    assert server.counts[status] == 2
+
+
+def test_run_load_reports_latency_fallback_and_memory():
+    with FakeOpenAIServer(rate_limit_rate=0.3, seed=1) as server:
+        _use_fake(server)
+        report = loadtest.run_load(
+            TestClient(api_app.app), loadtest.parse_mix("extract=3,search=1,stats=1"),
+            concurrency=4, iterations=40, users=3, memory_pid=os.getpid(), sample_interval=0.05,
+        )
+
+    ops = report["operations"]
+    assert sum(ops[op]["count"] for op in ("extract", "search", "stats")) == 40
+    assert ops["create"]["count"] == ops["extract"]["count"]
+    assert report["errors"] == 0
+    assert ops["extract"]["p50_ms"] <= ops["extract"]["p99_ms"] <= ops["extract"]["max_ms"]
+    assert report["extract"]["fallback"] == server.counts["rate_limited"]
+    assert 0 < report["fallback_rate"] < 1
+    assert report["memory"]["rss_start_mb"] > 0
+    assert sum(len(api_app.DB.partition(f"loadtest-{i}")) for i in range(3)) == ops["create"]["count"]
+
+
+def test_parse_mix_rejects_unknown_scenario():
+    assert loadtest.parse_mix("extract=2, stats") == {"extract": 2.0, "stats": 1.0}
+    with pytest.raises(ValueError):
+        loadtest.parse_mix("upload=1")
@@ -0,0 +1,60 @@
+import io
+import json
+
+import pytest
+
+from receipt_io import ImportReport, detect_format, iter_csv, iter_import_batches, iter_parquet
+
+
+ROWS = [
+    {"date": "2026-02-24", "store": "스타벅스 강남점", "amount": 9500, "category": "식비",
+     "items": [{"name": "아메리카노", "qty": 1, "price": 4500}], "raw_text": "sample", "source": "manual"},
+    {"date": "2026-02-23", "store": "Metro", "amount": 1400, "category": "교통비"},
+    {"date": "2026-02-22", "store": "Market", "amount": 12000, "category": "쇼핑"},
+]
+
+
+def test_detect_format():
+    assert detect_format("a.csv") == "csv"
+    assert detect_format("a.PARQUET") == "parquet"
+    assert detect_format("a.jsonl") == "jsonl"
+    assert detect_format(None) == "csv"
+
+
+def test_csv_round_trip_in_batches():
+    chunks = list(iter_csv([ROWS[:2], ROWS[2:]]))
+    assert len(chunks) == 2
+
+    report = ImportReport()
+    batches = list(iter_import_batches(io.BytesIO(b"".join(chunks)), "csv", batch_size=2, report=report))
+    assert [len(b) for b in batches] == [2, 1]
+    first = batches[0][0]
+    assert first.store == "스타벅스 강남점"
+    assert first.items[0].name == "아메리카노"
+    assert batches[0][1].items is None
+
+
+def test_import_rejects_invalid_rows():
+    data = "date,store,amount,category\n2026-02-24,A,1000,식비\n2026-02-24,B,-5,식비\n2026-02-24,C,10,없음\n"
+    report = ImportReport()
+    batches = list(iter_import_batches(io.BytesIO(data.encode("utf-8")), "csv", report=report))
+    assert sum(len(b) for b in batches) == 1
+    assert report.rejected == 2
+    assert report.errors[0].startswith("row 2")
+
+
+def test_jsonl_import_skips_malformed_lines():
+    lines = [json.dumps(ROWS[0], ensure_ascii=False), json.dumps(ROWS[1]), "{not json", "[1, 2]", json.dumps(ROWS[2])]
+    report = ImportReport()
+    data = "\n".join(lines).encode("utf-8")
+    batches = list(iter_import_batches(io.BytesIO(data), "jsonl", batch_size=1, report=report))
+    assert [b[0].store for b in batches] == ["스타벅스 강남점", "Metro", "Market"]
+    assert report.rejected == 2
+    assert [e.split(":")[0] for e in report.errors] == ["row 3", "row 4"]
+
+
+def test_parquet_round_trip():
+    pytest.importorskip("pyarrow")
+    data = b"".join(iter_parquet([ROWS[:1], ROWS[1:]]))
+    batches = list(iter_import_batches(io.BytesIO(data), "parquet", batch_size=10))
+    assert [r.amount for r in batches[0]] == [9500, 1400, 12000]
@@ -0,0 +1,84 @@
+from schemas import Receipt, ReceiptItem
+from search import SearchIndex, tokenize
+
+
+def _receipt(store, items=None, raw_text=None):
+    return Receipt(
+        id=store, date="2026-02-24", store=store, amount=1000, category="식비",
+        items=[ReceiptItem(name=n, price=100) for n in items or []], raw_text=raw_text,
+    )
+
+
+def test_tokenize_korean_bigrams():
+    assert tokenize("스타벅스 강남점") == ["스타", "타벅", "벅스", "강남", "남점"]
+    assert tokenize("GS25편의점") == ["gs25", "편의", "의점"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_store_over_raw_text():
+    index = SearchIndex()
+    index.add(0, _receipt("이마트", raw_text="스타벅스 쿠폰 사용"))
+    index.add(1, _receipt("스타벅스 강남점", items=["아메리카노"]))
+    index.add(2, _receipt("Metro"))
+
+    assert [doc for doc, _ in index.search("스타벅스")] == [1, 0]
+    assert [doc for doc, _ in index.search("벅스")] == [1, 0]
+    assert [doc for doc, _ in index.search("아메리카노")] == [1]
+    assert [doc for doc, _ in index.search("metro")] == [2]
+    assert index.search("스타벅스", limit=1)[0][0] == 1
+    assert index.search("없는가게") == []
+
+
+def test_single_syllable_query_matches_inside_words():
+    index = SearchIndex()
+    index.add(0, _receipt("파리바게뜨", items=["식빵", "크림빵"]))
+    index.add(1, _receipt("스타벅스 강남점"))
+    index.add(2, _receipt("빵"))
+    index.add(3, _receipt("이마트", items=["떡볶이"]))
+
+    assert sorted(doc for doc, _ in index.search("빵")) == [0, 2]
+    assert [doc for doc, _ in index.search("스")] == [1]
+    assert [doc for doc, _ in index.search("떡 이마트")] == [3]
+    assert index.search("술") == []
+
+
+def test_search_matches_brute_force_ranking():
+    import math
+    import random
+
+    rng = random.Random(3)
+    words = ["스타벅스", "강남점", "아메리카노", "라떼", "이마트", "GS25", "편의점"]
+    index = SearchIndex()
+    docs = []
+    for doc_id in range(500):
+        receipt = _receipt(
+            " ".join(rng.sample(words, 2)), items=rng.sample(words, rng.randint(0, 2)),
+            raw_text=" ".join(rng.sample(words, 3)),
+        )
+        index.add(doc_id, receipt)
+        docs.append(receipt)
+
+    def brute(query):
+        postings = {}
+        for doc_id, receipt in enumerate(docs):
+            weights = {}
+            for field, text in index._fields(receipt):
+                for token in tokenize(text):
+                    weights[token] = weights.get(token, 0.0) + {"store": 3.0, "items": 2.0, "raw_text": 1.0}[field]
+            for token, w in weights.items():
+                postings.setdefault(token, {})[doc_id] = w
+        terms = list(dict.fromkeys(tokenize(query)))
+        if any(t not in postings for t in terms):
+            return []
+        common = set.intersection(*(set(postings[t]) for t in terms))
+        scored = [
+            (d, sum(postings[t][d] * math.log(1 + len(docs) / len(postings[t])) for t in terms)) for d in common
+        ]
+        return sorted(scored, key=lambda x: (-x[1], x[0]))
+
+    for query in ["스타벅스", "라떼", "아메리카노 강남", "gs25 편의점", "이마트 라떼 스타"]:
+        expected = brute(query)
+        got = index.search(query)
+        assert [d for d, _ in got] == [d for d, _ in expected]
+        assert all(math.isclose(a, b) for (_, a), (_, b) in zip(got, expected))
+        assert index.search(query, limit=7) == got[:7]
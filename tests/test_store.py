@@ -0,0 +1,167 @@
+import pytest
+
+from schemas import ReceiptCreate
+from store import PartitionEvictedError, ReceiptStore, TenantStore
+
+
+def _payload(store, amount, date="2026-02-24", category="식비"):
+    return ReceiptCreate(date=date, store=store, amount=amount, category=category)
+
+
+def test_store_aggregates_match_rows():
+    store = ReceiptStore()
+    store.add(_payload("A", 1000))
+    store.add(_payload("B", 2000, date="2026-02-23", category="쇼핑"))
+    store.add(_payload("C", 500, date="2026-03-01"))
+    store.add(_payload("A", 1000), on_duplicate="flag")
+
+    stats = store.stats()
+    assert stats["total_amount"] == 3500
+    assert stats["count"] == 3
+    assert stats["top_category"] == "쇼핑"
+    assert [d["date"] for d in stats["daily_series"]] == ["2026-02-23", "2026-02-24", "2026-03-01"]
+
+    ranged = store.stats(from_date="2026-02-24", to_date="2026-02-28")
+    assert ranged["total_amount"] == 1000
+    assert ranged["category_series"] == [{"category": "식비", "amount": 1000}]
+
+
+def test_tenant_store_evicts_lru_and_reloads(tmp_path):
+    tenants = TenantStore(max_partitions=2, spill_dir=str(tmp_path))
+    tenants.partition("alice").add(_payload("A", 1000))
+    tenants.partition("bob").add(_payload("B", 2000))
+    tenants.partition("alice")
+    tenants.partition("carol").add(_payload("C", 3000))
+
+    assert tenants.resident_users() == ["alice", "carol"]
+    assert len(list(tmp_path.iterdir())) == 1
+
+    bob = tenants.partition("bob")
+    assert [r.store for r in bob] == ["B"]
+    assert bob.stats()["total_amount"] == 2000
+    assert [r.store for r in bob.query(q="B")] == ["B"]
+    assert list(bob)[0].user_id == "bob"
+    assert tenants.resident_users() == ["carol", "bob"]
+
+    tenants.clear()
+    assert len(tenants) == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_store_builds_line_item_table():
+    store = ReceiptStore()
+    items = [{"name": "아메리카노", "qty": 2, "price": 4500}, {"name": "라떼 ", "qty": 1, "price": 5000}]
+    store.add(ReceiptCreate(date="2026-01-05", store="A", amount=14000, category="식비", items=items))
+    store.add(ReceiptCreate(date="2026-02-03", store="B", amount=4500, category="식비", items=items[:1]))
+    store.add(ReceiptCreate(date="2026-01-05", store="A", amount=14000, category="식비", items=items), on_duplicate="flag")
+
+    frame = store.line_items.to_frame()
+    assert len(frame) == 3
+    assert list(frame["name"].cat.categories) == ["아메리카노", "라떼"]
+    assert len(store.line_items.to_frame(from_date="2026-02-01")) == 1
+
+    # 저장된 열을 복사하지 않고 읽기 전용 뷰로 넘김. 이후 삽입은 이미 받은 프레임에 영향 없음
+    import numpy as np
+    again = store.line_items.to_frame()
+    assert np.shares_memory(frame["qty"].to_numpy(), again["qty"].to_numpy())
+    assert np.shares_memory(frame["name"].array.codes, again["name"].array.codes)
+    with pytest.raises(ValueError):
+        again.loc[0, "qty"] = 99
+    for i in range(3000):
+        store.add(ReceiptCreate(date="2026-02-04", store=f"C{i}", amount=5000, category="식비",
+                                items=[{"name": f"품목{i}", "qty": 1, "price": 5000}]))
+    grown = store.line_items.to_frame()
+    assert len(grown) == 3003 and len(frame) == 3
+    assert grown["qty"].tolist()[:3] == [2, 1, 2]
+    assert grown["name"].tolist()[-1] == "품목2999"
+    assert list(frame["name"]) == ["아메리카노", "라떼", "아메리카노"]
+
+
+def test_alert_budgets_survive_partition_eviction(tmp_path):
+    tenants = TenantStore(max_partitions=1, spill_dir=str(tmp_path))
+    alice = tenants.partition("alice")
+    alice.alerts.set_budgets({"식비": 10000})
+    alice.add(ReceiptCreate(date="2026-03-01", store="A", amount=8000, category="식비"))
+    tenants.partition("bob")
+
+    alice = tenants.partition("alice")
+    assert alice.alerts.budgets == {"식비": 10000}
+    alice.add(ReceiptCreate(date="2026-03-02", store="B", amount=3000, category="식비"))
+    assert [a.kind for a in alice.alerts.alerts()] == ["budget"]
+
+
+def test_concurrent_inserts_get_distinct_doc_ids():
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = ReceiptStore(on_duplicate="allow")
+
+    def insert(worker):
+        for i in range(300):
+            store.add(ReceiptCreate(date="2026-01-01", store=f"w{worker}n{i}", amount=1000, category="식비"))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(insert, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert len(store) == 2400
+    for receipt in store:
+        assert [r.store for r in store.query(q=receipt.store)] == [receipt.store]
+
+
+def test_pinned_partition_is_not_evicted(tmp_path):
+    tenants = TenantStore(max_partitions=1, spill_dir=str(tmp_path))
+    with tenants.use("alice") as alice:
+        with tenants.use("bob") as bob:
+            bob.add(_payload("B", 2000))
+        alice.add(_payload("A", 1000))
+        assert tenants.resident_users() == ["alice"]
+    assert len(tenants.partition("alice")) == 1
+    assert len(tenants.partition("bob")) == 1
+
+
+def test_write_to_evicted_partition_is_rejected(tmp_path):
+    tenants = TenantStore(max_partitions=1, spill_dir=str(tmp_path))
+    alice = tenants.partition("alice")
+    tenants.partition("bob")
+    with pytest.raises(PartitionEvictedError):
+        alice.add(_payload("A", 1000))
+    tenants.partition("alice").add(_payload("A", 1000))
+    assert len(tenants.partition("alice")) == 1
+
+
+def test_spill_io_does_not_block_other_tenants(tmp_path):
+    import threading
+
+    tenants = TenantStore(max_partitions=2, spill_dir=str(tmp_path))
+    tenants.partition("alice").add(_payload("A", 1000))
+    tenants.partition("carol").add(_payload("C", 3000))
+
+    writing, release = threading.Event(), threading.Event()
+    evict = tenants._evict
+
+    def slow_evict(path, partition):
+        writing.set()
+        release.wait(5)
+        evict(path, partition)
+
+    tenants._evict = slow_evict
+    spiller = threading.Thread(target=tenants.partition, args=("bob",))
+    spiller.start()
+    assert writing.wait(5)
+
+    # alice를 파일로 쓰는 동안에도 다른 사용자는 바로 처리되고, alice는 쓰기가 끝나길 기다림
+    assert len(tenants.partition("carol")) == 1
+    reader = threading.Thread(target=lambda: tenants.partition("alice"))
+    reader.start()
+    reader.join(0.2)
+    assert reader.is_alive()
+
+    release.set()
+    spiller.join(5)
+    reader.join(5)
+    assert [r.store for r in tenants.partition("alice")] == ["A"]